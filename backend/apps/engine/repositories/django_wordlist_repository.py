@@ -5,6 +5,9 @@
 
 import logging
 
+from django.db.models import F
+from django.utils import timezone
+
 from apps.engine.models import Wordlist
 from apps.common.decorators import auto_ensure_db_connection
 
@@ -39,6 +42,18 @@ class DjangoWordlistRepository:
         """创建字典记录"""
         return Wordlist.objects.create(**kwargs)
 
+    def increment_stats(self, wordlist_id: int, line_delta: int, size_delta: int) -> int:
+        """增量更新字典统计信息（行数/大小基于数据库当前值累加，避免读-改-写）"""
+        return Wordlist.objects.filter(pk=wordlist_id).update(
+            line_count=F("line_count") + line_delta,
+            file_size=F("file_size") + size_delta,
+            updated_at=timezone.now(),
+        )
+
+    def update_file_hash(self, wordlist_id: int, file_hash: str, file_size: int) -> int:
+        """更新字典 hash，仅当记录中的文件大小仍为计算 hash 时的大小（期间无新的追加）"""
+        return Wordlist.objects.filter(pk=wordlist_id, file_size=file_size).update(file_hash=file_hash)
+
     def delete(self, wordlist_id: int) -> bool:
         """删除字典记录"""
         wordlist = self.get_by_id(wordlist_id)
@@ -3,7 +3,7 @@
 本模块包含两个 Repository 类，负责数据访问：
 
 1. NucleiTemplateRepository
-   - 职责：ORM 操作，按 ID 查询仓库配置
+   - 职责：ORM 操作，查询仓库配置
    - 被 Service 层调用，不直接被 View 调用
 
 2. TemplateFileRepository
@@ -46,6 +46,14 @@ class NucleiTemplateRepository:
         except NucleiTemplateRepo.DoesNotExist:
             return None
 
+    def get_all(self) -> List[NucleiTemplateRepo]:
+        """获取所有仓库对象
+
+        Returns:
+            NucleiTemplateRepo 对象列表
+        """
+        return list(NucleiTemplateRepo.objects.all())
+
 
 class TemplateFileRepository:
     """模板文件系统 Repository（只读）
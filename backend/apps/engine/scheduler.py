@@ -88,6 +88,16 @@ def _register_scheduled_jobs(scheduler: BackgroundScheduler):
         replace_existing=True,
     )
     logger.info("  - 已注册: 扫描结果清理（每天 03:00）")
+    
+    # 4. Nuclei 模板仓库预取（每5分钟 git fetch，手动同步时直接命中本地对象）
+    scheduler.add_job(
+        _trigger_nuclei_repo_prefetch,
+        trigger=IntervalTrigger(minutes=5),
+        id='nuclei_repo_prefetch',
+        name='Nuclei 模板仓库预取',
+        replace_existing=True,
+    )
+    logger.info("  - 已注册: Nuclei 模板仓库预取（每5分钟）")
 
 
 def _trigger_scheduled_scans():
@@ -131,3 +141,17 @@ def _trigger_cleanup():
         
     except Exception as e:
         logger.error(f"扫描清理任务分发失败: {e}", exc_info=True)
+
+
+def _trigger_nuclei_repo_prefetch():
+    """触发 Nuclei 模板仓库预取（git fetch，不改动工作区）"""
+    try:
+        from apps.engine.services.nuclei_template_repo_service import NucleiTemplateRepoService
+        
+        service = NucleiTemplateRepoService()
+        fetched = service.prefetch_all_repos()
+        
+        logger.debug(f"Nuclei 模板仓库预取完成: {fetched} 个")
+        
+    except Exception as e:
+        logger.error(f"Nuclei 模板仓库预取失败: {e}", exc_info=True)
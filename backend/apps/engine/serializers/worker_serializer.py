@@ -3,13 +3,15 @@ Worker 节点序列化器
 """
 from rest_framework import serializers
 from apps.engine.models import WorkerNode
+from apps.engine.services.worker_load_service import worker_load_service
 
 
 class WorkerNodeSerializer(serializers.ModelSerializer):
     """
     Worker 节点序列化器
     
-    优化：通过 context['loads'] 传入批量查询的 Redis 数据，避免 N+1 查询
+    优化：通过 context['loads'] 传入批量查询的 Redis 数据，避免 N+1 查询。
+    context 中存在 loads 时，未命中即视为无心跳数据，不再逐条回退查询 Redis。
     """
     
     # 密码只写（不返回给前端）
@@ -27,9 +29,13 @@ class WorkerNodeSerializer(serializers.ModelSerializer):
                   'is_local', 'info', 'created_at', 'updated_at', 'password']
         read_only_fields = ['id', 'status', 'is_local', 'info', 'created_at', 'updated_at']
     
+    def _has_preloaded_loads(self) -> bool:
+        """context 中是否已批量预加载负载数据"""
+        return self.context.get('loads') is not None
+    
     def _get_load_from_context(self, worker_id: int) -> dict | None:
         """从 context 获取预加载的负载数据"""
-        loads = self.context.get('loads', {})
+        loads = self.context.get('loads') or {}
         return loads.get(worker_id)
     
     def get_status(self, obj) -> str:
@@ -47,9 +53,10 @@ class WorkerNodeSerializer(serializers.ModelSerializer):
         load = self._get_load_from_context(obj.id)
         if load is not None:
             return 'online'
+        if self._has_preloaded_loads():
+            return 'offline'
         
         # 回退：单独查询 Redis
-        from apps.engine.services.worker_load_service import worker_load_service
         if worker_load_service.is_online(obj.id):
             return 'online'
         return 'offline'
@@ -67,9 +74,10 @@ class WorkerNodeSerializer(serializers.ModelSerializer):
                 'cpuPercent': load.get('cpu', 0),
                 'memoryPercent': load.get('mem', 0),
             }
+        if self._has_preloaded_loads():
+            return None
         
         # 回退：单独查询 Redis
-        from apps.engine.services.worker_load_service import worker_load_service
         load = worker_load_service.get_load(obj.id)
         if load:
             return {
@@ -4,9 +4,12 @@
 
 1. Git 同步（refresh_repo）
    - 首次调用：git clone --depth 1
-   - 后续调用：git pull --ff-only
+   - 后续调用：git fetch --depth 1 + git reset --hard FETCH_HEAD
    - 自动更新 last_synced_at 和 local_path
 
+   - 后台同步：submit_refresh 在后台线程执行 refresh_repo，前端通过 task_id 轮询状态
+   - 定时预取：prefetch_all_repos 由调度器定期执行 git fetch，保持本地对象为最新
+
 2. 模板只读浏览
    - get_template_tree: 获取目录树结构
    - get_template_content: 获取单个模板文件内容
@@ -14,7 +17,8 @@
 注意：仓库的 CRUD 操作由 DRF ModelViewSet 默认实现，不在 Service 层处理。
 
 调用链路：
-    View.refresh() → Service.refresh_repo() → subprocess(git)
+    View.refresh() → Service.submit_refresh() → 后台线程 → Service.refresh_repo() → subprocess(git)
+    View.refresh_status() → Service.get_refresh_status()
     View.templates_tree() → Service.get_template_tree() → Repository.get_tree()
     View.templates_content() → Service.get_template_content() → Repository.get_file_content()
 
@@ -24,13 +28,19 @@
 
 from __future__ import annotations
 
+import functools
 import logging
+import os
 import shutil
+import subprocess
+import threading
+import uuid
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.utils import timezone
 
 from apps.engine.repositories import NucleiTemplateRepository, TemplateFileRepository
@@ -38,6 +48,33 @@ from apps.engine.repositories import NucleiTemplateRepository, TemplateFileRepos
 
 logger = logging.getLogger(__name__)
 
+# 后台同步任务状态表（进程内）：task_id -> {"repoId", "status", "result", "error"}
+# Server 以单个 uvicorn 进程运行，进程内状态即可满足轮询需求
+_refresh_tasks: Dict[str, Dict[str, Any]] = {}
+_refresh_tasks_lock = threading.Lock()
+# 仓库 ID -> 正在执行的 task_id，避免同一仓库并发执行 git 命令
+_running_refresh_by_repo: Dict[int, str] = {}
+# 定时预取占用仓库时登记在 _running_refresh_by_repo 中的标记前缀（非真实 task_id）
+_PREFETCH_MARKER_PREFIX = "prefetch-"
+# 仓库 ID -> 预取完成事件；预取期间提交的手动同步在后台线程中等待预取结束后再执行
+_prefetch_done_by_repo: Dict[int, threading.Event] = {}
+# 预取 git fetch 的超时时间（秒），避免远端卡住时长期占用调度线程
+_PREFETCH_TIMEOUT = 600
+# 最多保留的任务状态条数，超出后淘汰已结束的旧任务
+_MAX_REFRESH_TASKS = 200
+
+# Git 子进程环境：禁止交互式输入凭据（避免挂起），跳过 LFS 大文件下载
+_GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0", "GIT_LFS_SKIP_SMUDGE": "1"}
+
+
+@functools.lru_cache(maxsize=1)
+def _resolved_base_dir() -> Path:
+    """解析并创建仓库本地存储根目录（每个进程只执行一次 resolve + mkdir）"""
+    base_dir = getattr(settings, "NUCLEI_TEMPLATES_REPOS_BASE_DIR", "/opt/xingrin/nuclei-repos")
+    path = Path(base_dir).resolve()
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
 
 class NucleiTemplateRepoService:
     """Nuclei 多仓库业务 Service
@@ -80,15 +117,12 @@ class NucleiTemplateRepoService:
         """获取仓库本地存储根目录
 
         从 settings.NUCLEI_TEMPLATES_REPOS_BASE_DIR 读取，默认 /opt/xingrin/nuclei-repos。
-        如果目录不存在会自动创建。
+        如果目录不存在会自动创建。结果按进程缓存，避免重复 resolve/mkdir。
 
         Returns:
             根目录 Path 对象
         """
-        base_dir = getattr(settings, "NUCLEI_TEMPLATES_REPOS_BASE_DIR", "/opt/xingrin/nuclei-repos")
-        path = Path(base_dir).resolve()
-        path.mkdir(parents=True, exist_ok=True)
-        return path
+        return _resolved_base_dir()
 
     def remove_local_path_dir(self, repo_obj) -> None:
         """删除与仓库关联的本地目录（如果存在）
@@ -131,7 +165,8 @@ class NucleiTemplateRepoService:
             /opt/xingrin/nuclei-repos/di-san-fang-mo-ban
           - 如果 name 不可 slugify，则退化为 repo-<id>
 
-        任何情况下都会保证目标目录已创建。
+        任何情况下都会保证目标目录已创建。解析结果缓存在 repo_obj._resolved_local_path 上，
+        同一对象重复调用时不再 resolve/mkdir。
 
         Args:
             repo_obj: NucleiTemplateRepo 实例
@@ -141,6 +176,10 @@ class NucleiTemplateRepoService:
         """
         from django.utils.text import slugify
 
+        cached = getattr(repo_obj, "_resolved_local_path", None)
+        if cached is not None and cached[0] == repo_obj.local_path:
+            return cached[1]
+
         # 已有 local_path，直接规范化为绝对路径
         if getattr(repo_obj, "local_path", None):
             path = Path(repo_obj.local_path).expanduser().resolve()
@@ -156,6 +195,7 @@ class NucleiTemplateRepoService:
             repo_obj.save(update_fields=["local_path"])
 
         path.mkdir(parents=True, exist_ok=True)
+        repo_obj._resolved_local_path = (repo_obj.local_path, path)
         return path
 
     # ==================== Git 同步 ====================
@@ -165,7 +205,8 @@ class NucleiTemplateRepoService:
 
         根据 local_path 是否存在 .git 目录判断：
         - 不存在：执行 git clone --depth 1（浅克隆，节省空间）
-        - 存在：执行 git pull --ff-only（快进合并）
+        - 存在：执行 git fetch --depth 1 origin HEAD + git reset --hard FETCH_HEAD
+          （浅克隆上 pull 容易失败或重新下载历史，fetch + reset 只传输最新快照，且无需合并）
 
         同步成功后会更新数据库中的 last_synced_at 和 local_path。
 
@@ -185,8 +226,6 @@ class NucleiTemplateRepoService:
             ValidationError: 仓库不存在
             RuntimeError: Git 命令执行失败
         """
-        import subprocess
-
         obj = self._get_repo_obj(repo_id)
 
         # 确保本地路径已生成并为绝对路径
@@ -202,9 +241,9 @@ class NucleiTemplateRepoService:
             current_remote = subprocess.run(
                 ["git", "-C", str(local_path), "remote", "get-url", "origin"],
                 check=False,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                capture_output=True,
                 text=True,
+                env=_GIT_ENV,
             )
             current_url = current_remote.stdout.strip() if current_remote.returncode == 0 else ""
             
@@ -216,8 +255,8 @@ class NucleiTemplateRepoService:
                 cmd = ["git", "clone", "--depth", "1", obj.repo_url, str(local_path)]
                 action = "clone"
             else:
-                # 已有仓库且地址未变，执行 pull
-                cmd = ["git", "-C", str(local_path), "pull", "--ff-only"]
+                # 已有仓库且地址未变，fetch 最新快照后重置工作区
+                cmd = ["git", "-C", str(local_path), "fetch", "--depth", "1", "origin", "HEAD"]
                 action = "pull"
         else:
             # 新仓库，执行 clone
@@ -231,25 +270,33 @@ class NucleiTemplateRepoService:
         result = subprocess.run(
             cmd,
             check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            capture_output=True,
             text=True,
+            env=_GIT_ENV,
         )
 
+        if result.returncode == 0 and action == "pull":
+            reset_result = subprocess.run(
+                ["git", "-C", str(local_path), "reset", "--hard", "FETCH_HEAD"],
+                check=False,
+                capture_output=True,
+                text=True,
+                env=_GIT_ENV,
+            )
+            result = subprocess.CompletedProcess(
+                args=cmd,
+                returncode=reset_result.returncode,
+                stdout=result.stdout + reset_result.stdout,
+                stderr=result.stderr + reset_result.stderr,
+            )
+
         # 检查执行结果
         if result.returncode != 0:
             logger.warning("nuclei 模板仓库 %s git %s 失败: %s", obj.id, action, result.stderr.strip())
             raise RuntimeError("Git 同步失败")
 
-        # 获取当前 commit hash
-        commit_result = subprocess.run(
-            ["git", "-C", str(local_path), "rev-parse", "HEAD"],
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        commit_hash = commit_result.stdout.strip() if commit_result.returncode == 0 else ""
+        # 获取当前 commit hash（直接读取 .git 引用文件，省去一次 git rev-parse 子进程）
+        commit_hash = self._read_head_commit(local_path)
 
         # 同步成功，更新数据库（包含 commit_hash）
         obj.last_synced_at = timezone.now()
@@ -271,6 +318,180 @@ class NucleiTemplateRepoService:
             "stderr": result.stderr,
         }
 
+    @staticmethod
+    def _read_head_commit(local_path: Path) -> str:
+        """读取仓库 HEAD 指向的 commit hash
+
+        解析顺序：.git/HEAD → 松散引用文件 .git/refs/... → .git/packed-refs。
+
+        Args:
+            local_path: 仓库本地根目录
+
+        Returns:
+            40 位 commit hash，解析失败返回空字符串
+        """
+        git_dir = local_path / ".git"
+        try:
+            head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+            if not head.startswith("ref: "):
+                # detached HEAD，内容即为 commit hash
+                return head
+
+            ref = head[len("ref: "):].strip()
+            ref_file = git_dir / ref
+            if ref_file.is_file():
+                return ref_file.read_text(encoding="utf-8").strip()
+
+            packed_refs = git_dir / "packed-refs"
+            if packed_refs.is_file():
+                for line in packed_refs.read_text(encoding="utf-8").splitlines():
+                    if line.startswith(("#", "^")):
+                        continue
+                    commit, _, name = line.partition(" ")
+                    if name.strip() == ref:
+                        return commit.strip()
+        except OSError as exc:
+            logger.warning("读取仓库 HEAD 失败: %s - %s", local_path, exc)
+        return ""
+
+    def submit_refresh(self, repo_id: int) -> str:
+        """提交后台同步任务，立即返回 task_id
+
+        同一仓库已有同步任务在执行时，直接返回该任务的 task_id。
+
+        Args:
+            repo_id: 仓库 ID
+
+        Returns:
+            task_id 字符串
+
+        Raises:
+            ValidationError: 仓库不存在
+        """
+        self._get_repo_obj(repo_id)
+
+        prefetch_done = None
+        with _refresh_tasks_lock:
+            running_task_id = _running_refresh_by_repo.get(repo_id)
+            if running_task_id:
+                if not running_task_id.startswith(_PREFETCH_MARKER_PREFIX):
+                    return running_task_id
+                # 定时预取正在执行：接管仓库占用，后台线程等预取结束后再同步
+                prefetch_done = _prefetch_done_by_repo.get(repo_id)
+
+            task_id = uuid.uuid4().hex
+            _refresh_tasks[task_id] = {
+                "repoId": repo_id,
+                "status": "running",
+                "result": None,
+                "error": "",
+            }
+            _running_refresh_by_repo[repo_id] = task_id
+            self._evict_finished_tasks()
+
+        threading.Thread(
+            target=self._run_refresh_task,
+            args=(task_id, repo_id, prefetch_done),
+            daemon=True,
+        ).start()
+        logger.info("nuclei 模板仓库 %s 同步任务已提交: %s", repo_id, task_id)
+        return task_id
+
+    def get_refresh_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """获取后台同步任务状态
+
+        Returns:
+            {"taskId", "repoId", "status": "running" | "success" | "failed", "result", "error"}
+            task_id 不存在时返回 None
+        """
+        with _refresh_tasks_lock:
+            task = _refresh_tasks.get(task_id)
+            if task is None:
+                return None
+            return {"taskId": task_id, **task}
+
+    def _run_refresh_task(
+        self, task_id: str, repo_id: int, prefetch_done: Optional[threading.Event] = None
+    ) -> None:
+        """后台线程：执行同步并记录结果（prefetch_done 不为空时先等待定时预取结束）"""
+        status, result, error = "failed", None, ""
+        try:
+            if prefetch_done is not None:
+                # 预取的 git fetch 带超时，等待时间有上限
+                prefetch_done.wait()
+            result = self.refresh_repo(repo_id)
+            status = "success"
+        except ValidationError as exc:
+            error = "; ".join(exc.messages)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("nuclei 模板仓库 %s 后台同步失败: %s", repo_id, exc)
+            error = str(exc)
+        finally:
+            # 后台线程使用独立的数据库连接，结束时主动释放
+            connection.close()
+            with _refresh_tasks_lock:
+                _refresh_tasks[task_id].update(status=status, result=result, error=error)
+                if _running_refresh_by_repo.get(repo_id) == task_id:
+                    del _running_refresh_by_repo[repo_id]
+
+    @staticmethod
+    def _evict_finished_tasks() -> None:
+        """淘汰最早结束的任务状态，限制状态表大小（调用方需持有锁）"""
+        overflow = len(_refresh_tasks) - _MAX_REFRESH_TASKS
+        if overflow <= 0:
+            return
+        finished = [tid for tid, task in _refresh_tasks.items() if task["status"] != "running"]
+        for tid in finished[:overflow]:
+            del _refresh_tasks[tid]
+
+    def prefetch_all_repos(self) -> int:
+        """对所有已 clone 的仓库执行 git fetch（只下载对象，不改动工作区）
+
+        由调度器定期调用，使用户手动同步时大部分数据已在本地。
+        预取期间仓库登记在 _running_refresh_by_repo 中，与手动同步互斥；
+        git fetch 超过 _PREFETCH_TIMEOUT 秒视为失败。
+
+        Returns:
+            成功预取的仓库数量
+        """
+        fetched = 0
+        for obj in self.repo.get_all():
+            raw = (obj.local_path or "").strip()
+            if not raw or not (Path(raw) / ".git").is_dir():
+                continue
+            marker = f"{_PREFETCH_MARKER_PREFIX}{uuid.uuid4().hex}"
+            done = threading.Event()
+            with _refresh_tasks_lock:
+                if obj.id in _running_refresh_by_repo:
+                    continue
+                _running_refresh_by_repo[obj.id] = marker
+                _prefetch_done_by_repo[obj.id] = done
+            try:
+                result = subprocess.run(
+                    ["git", "-C", raw, "fetch", "--depth", "1", "origin", "HEAD"],
+                    check=False,
+                    capture_output=True,
+                    text=True,
+                    env=_GIT_ENV,
+                    timeout=_PREFETCH_TIMEOUT,
+                )
+            except subprocess.TimeoutExpired:
+                logger.warning("nuclei 模板仓库 %s git fetch 超时（%d 秒）", obj.id, _PREFETCH_TIMEOUT)
+                continue
+            finally:
+                with _refresh_tasks_lock:
+                    # 预取期间提交的手动同步已接管占用时，保留其 task_id
+                    if _running_refresh_by_repo.get(obj.id) == marker:
+                        del _running_refresh_by_repo[obj.id]
+                    if _prefetch_done_by_repo.get(obj.id) is done:
+                        del _prefetch_done_by_repo[obj.id]
+                done.set()
+            if result.returncode != 0:
+                logger.warning("nuclei 模板仓库 %s git fetch 失败: %s", obj.id, result.stderr.strip())
+                continue
+            fetched += 1
+        return fetched
+
     # ==================== 模板树与内容（只读） ====================
 
     def _get_fs_repo(self, repo_id: int) -> TemplateFileRepository:
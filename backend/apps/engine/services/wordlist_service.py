@@ -6,12 +6,15 @@
 import hashlib
 import logging
 import os
+import tempfile
+import threading
 import time
 from typing import Optional
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, connection, transaction
 
 from apps.common.utils import safe_calc_file_sha256
 from apps.engine.models import Wordlist
@@ -20,6 +23,9 @@ from apps.engine.repositories import DjangoWordlistRepository
 
 logger = logging.getLogger(__name__)
 
+# JSON 方式读取/编辑字典内容的大小上限，更大的文件请使用 raw 流式下载
+MAX_EDITABLE_BYTES = 5 << 20
+
 
 class WordlistService:
     """字典文件业务逻辑服务"""
@@ -54,9 +60,6 @@ class WordlistService:
         if not name:
             raise ValidationError("字典名称不能为空")
 
-        if self._exists_by_name(name):
-            raise ValidationError("已存在同名字典")
-
         base_dir = getattr(settings, "WORDLISTS_BASE_PATH", "/opt/xingrin/wordlists")
         storage_dir = base_dir
         os.makedirs(storage_dir, exist_ok=True)
@@ -71,36 +74,53 @@ class WordlistService:
             safe_name = f"{base}.txt"
 
         full_path = os.path.join(storage_dir, safe_name)
-
-        # 边写边算 hash
-        hasher = hashlib.sha256()
-        with open(full_path, "wb+") as dest:
-            for chunk in uploaded_file.chunks():
-                dest.write(chunk)
-                hasher.update(chunk)
-        file_hash = hasher.hexdigest()
-
+        # 先写入临时文件，数据库记录创建成功后再替换正式文件，
+        # 避免同名字典创建失败时覆盖已有字典的文件；
+        # 临时文件名唯一，并发上传同名文件时互不干扰
+        fd, tmp_path = tempfile.mkstemp(dir=storage_dir, prefix=f".{safe_name}.", suffix=".uploading")
         try:
-            file_size = os.path.getsize(full_path)
-        except OSError:
-            file_size = 0
+            # 边写边算 hash
+            hasher = hashlib.sha256()
+            with os.fdopen(fd, "wb") as dest:
+                # mkstemp 默认 0600，与直接 open 创建的文件权限保持一致
+                os.fchmod(dest.fileno(), 0o644)
+                for chunk in uploaded_file.chunks():
+                    dest.write(chunk)
+                    hasher.update(chunk)
+            file_hash = hasher.hexdigest()
 
-        line_count = 0
-        try:
-            with open(full_path, "rb") as f:
-                for _ in f:
-                    line_count += 1
-        except OSError:
-            logger.warning("统计字典行数失败: %s", full_path)
-
-        wordlist = self.repo.create(
-            name=name,
-            description=description or "",
-            file_path=full_path,
-            file_size=file_size,
-            line_count=line_count,
-            file_hash=file_hash,
-        )
+            try:
+                file_size = os.path.getsize(tmp_path)
+            except OSError:
+                file_size = 0
+
+            line_count = 0
+            try:
+                with open(tmp_path, "rb") as f:
+                    for _ in f:
+                        line_count += 1
+            except OSError:
+                logger.warning("统计字典行数失败: %s", tmp_path)
+
+            # 名称唯一性由数据库唯一约束保证（无需预先查询，且并发安全）；
+            # 文件替换放在事务内，替换失败时插入随之回滚，不会留下指向缺失文件的记录
+            try:
+                with transaction.atomic():
+                    wordlist = self.repo.create(
+                        name=name,
+                        description=description or "",
+                        file_path=full_path,
+                        file_size=file_size,
+                        line_count=line_count,
+                        file_hash=file_hash,
+                    )
+                    os.replace(tmp_path, full_path)
+            except IntegrityError as exc:
+                raise ValidationError("已存在同名字典") from exc
+        finally:
+            # 任一步失败（含写入异常、名称冲突）时清理残留的临时文件
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
         logger.info(
             "创建字典: id=%s, name=%s, size=%s, lines=%s, hash=%s",
@@ -128,16 +148,31 @@ class WordlistService:
 
         return self.repo.delete(wordlist_id)
 
-    def _exists_by_name(self, name: str) -> bool:
-        """判断是否存在同名的字典"""
-        return self.repo.get_queryset().filter(name=name).exists()
+    def get_wordlist_file_path(self, wordlist_id: int) -> Optional[str]:
+        """获取字典文件路径（记录或文件不存在时返回 None）"""
+        wordlist = self.repo.get_by_id(wordlist_id)
+        if not wordlist or not wordlist.file_path or not os.path.isfile(wordlist.file_path):
+            return None
+        return wordlist.file_path
 
     def get_wordlist_content(self, wordlist_id: int) -> Optional[str]:
-        """获取字典文件内容"""
+        """获取字典文件内容
+
+        Raises:
+            ValidationError: 文件超过 MAX_EDITABLE_BYTES，不适合整体读入内存
+        """
         wordlist = self.repo.get_by_id(wordlist_id)
         if not wordlist or not wordlist.file_path:
             return None
 
+        try:
+            file_size = os.path.getsize(wordlist.file_path)
+        except OSError as exc:
+            logger.warning("读取字典文件失败: %s - %s", wordlist.file_path, exc)
+            return None
+        if file_size > MAX_EDITABLE_BYTES:
+            raise ValidationError(f"字典文件过大（{file_size} 字节），请使用 raw 方式获取")
+
         try:
             with open(wordlist.file_path, "r", encoding="utf-8", errors="replace") as f:
                 return f.read()
@@ -146,15 +181,23 @@ class WordlistService:
             return None
 
     def update_wordlist_content(self, wordlist_id: int, content: str) -> Optional[Wordlist]:
-        """更新字典文件内容并重新计算 hash"""
+        """更新字典文件内容并重新计算 hash
+
+        Raises:
+            ValidationError: 内容超过 MAX_EDITABLE_BYTES（与 JSON 读取上限一致）
+        """
+        data = content.encode("utf-8")
+        if len(data) > MAX_EDITABLE_BYTES:
+            raise ValidationError(f"字典内容过大（{len(data)} 字节），超过 {MAX_EDITABLE_BYTES} 字节上限")
+
         wordlist = self.repo.get_by_id(wordlist_id)
         if not wordlist or not wordlist.file_path:
             return None
 
         try:
-            # 写入新内容
-            with open(wordlist.file_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            # 写入新内容（已编码，直接按字节写入）
+            with open(wordlist.file_path, "wb") as f:
+                f.write(data)
 
             # 重新计算统计信息
             file_size = os.path.getsize(wordlist.file_path)
@@ -180,5 +223,70 @@ class WordlistService:
             logger.error("写入字典文件失败: %s - %s", wordlist.file_path, exc)
             return None
 
+    def append_lines(self, wordlist_id: int, lines: list[str]) -> Optional[Wordlist]:
+        """向字典末尾追加若干行
+
+        只写入新增部分，line_count / file_size 按增量累加，不再重新扫描整个文件。
+        条目内嵌的换行会拆成多行（计数与实际写入的行数一致）。
+        file_hash 需要整文件计算，放到后台线程执行，不阻塞本次请求。
+        """
+        wordlist = self.repo.get_by_id(wordlist_id)
+        if not wordlist or not wordlist.file_path:
+            return None
+
+        lines = [line for raw in lines for line in raw.splitlines() if line]
+        if not lines:
+            return wordlist
+
+        try:
+            with open(wordlist.file_path, "ab+") as f:
+                # 原文件末尾没有换行时先补一个，避免与最后一行粘连
+                prefix = b""
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        prefix = b"\n"
+                data = prefix + ("\n".join(lines) + "\n").encode("utf-8")
+                f.write(data)
+        except OSError as exc:
+            logger.error("追加字典内容失败: %s - %s", wordlist.file_path, exc)
+            return None
+
+        self.repo.increment_stats(wordlist_id, len(lines), len(data))
+        wordlist.refresh_from_db(fields=["file_size", "line_count", "file_hash", "updated_at"])
+
+        threading.Thread(
+            target=self._refresh_file_hash,
+            args=(wordlist_id, wordlist.file_path),
+            daemon=True,
+        ).start()
+
+        logger.info(
+            "追加字典内容: id=%s, name=%s, appended=%s, lines=%s",
+            wordlist.id,
+            wordlist.name,
+            len(lines),
+            wordlist.line_count,
+        )
+        return wordlist
+
+    def _refresh_file_hash(self, wordlist_id: int, file_path: str) -> None:
+        """后台线程：重新计算字典 hash 并写回
+
+        计算前后文件大小不变时才写入；期间又有追加时由后一次追加的线程负责更新，
+        避免较早的计算结果覆盖较新的 hash。
+        """
+        try:
+            size = os.path.getsize(file_path)
+            file_hash = safe_calc_file_sha256(file_path)
+            if file_hash is None or os.path.getsize(file_path) != size:
+                return
+            self.repo.update_file_hash(wordlist_id, file_hash, size)
+        except OSError as exc:
+            logger.warning("更新字典 hash 失败: %s - %s", file_path, exc)
+        finally:
+            # 后台线程使用独立的数据库连接，结束时主动释放
+            connection.close()
+
 
-__all__ = ["WordlistService"]
+__all__ = ["WordlistService", "MAX_EDITABLE_BYTES"]
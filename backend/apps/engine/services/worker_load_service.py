@@ -4,9 +4,14 @@ Worker 负载服务（Redis）
 存储结构：
 - worker:load:{worker_id} - Hash: {cpu, mem, updated}
 - TTL: 60 秒（超时自动清理）
+
+写入方式：
+- update_load 只写入进程内缓冲区，后台线程每 FLUSH_INTERVAL 秒通过一个 pipeline 批量写入 Redis
 """
 
 import logging
+import threading
+import time
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -26,8 +31,15 @@ class WorkerLoadService:
     # 心跳间隔 3 秒，TTL 设为 15 秒（5 次心跳容错）
     TTL_SECONDS = 15
     
+    # 心跳缓冲区刷新间隔（秒）
+    FLUSH_INTERVAL = 1.0
+    
     def __init__(self):
         self._redis: Optional[redis.Redis] = None
+        # 待写入的负载数据：worker_id -> {cpu, mem, updated}（同一 Worker 只保留最新一次）
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
     
     @property
     def redis(self) -> redis.Redis:
@@ -47,7 +59,7 @@ class WorkerLoadService:
     
     def update_load(self, worker_id: int, cpu_percent: float, memory_percent: float) -> bool:
         """
-        更新 Worker 负载数据
+        更新 Worker 负载数据（写入缓冲区，由后台线程批量刷新到 Redis）
         
         Args:
             worker_id: Worker ID
@@ -57,24 +69,56 @@ class WorkerLoadService:
         Returns:
             是否成功
         """
+        data = {
+            "cpu": cpu_percent,
+            "mem": memory_percent,
+            "updated": datetime.now().isoformat(),
+        }
+        with self._pending_lock:
+            self._pending[worker_id] = data
+            self._ensure_flusher()
+        return True
+    
+    def _ensure_flusher(self) -> None:
+        """按需启动后台刷新线程（调用方需持有 _pending_lock）"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name="worker-load-flusher",
+            daemon=True,
+        )
+        self._flusher.start()
+    
+    def _flush_loop(self) -> None:
+        """后台线程：定期刷新缓冲区"""
+        while True:
+            time.sleep(self.FLUSH_INTERVAL)
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        将缓冲区中的负载数据批量写入 Redis（一次往返）
+        
+        Returns:
+            写入的 Worker 数量
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return 0
+            snapshot, self._pending = self._pending, {}
+        
         try:
-            key = self._key(worker_id)
-            data = {
-                "cpu": cpu_percent,
-                "mem": memory_percent,
-                "updated": datetime.now().isoformat(),
-            }
-            
-            # 使用 pipeline 原子操作
-            pipe = self.redis.pipeline()
-            pipe.hset(key, mapping=data)
-            pipe.expire(key, self.TTL_SECONDS)
+            pipe = self.redis.pipeline(transaction=False)
+            for worker_id, data in snapshot.items():
+                key = self._key(worker_id)
+                pipe.hset(key, mapping=data)
+                pipe.expire(key, self.TTL_SECONDS)
             pipe.execute()
-            
-            return True
+            return len(snapshot)
         except Exception as e:
-            logger.error(f"更新 Worker 负载失败 - ID: {worker_id}: {e}")
-            return False
+            logger.error(f"批量写入 Worker 负载失败 - 数量: {len(snapshot)}: {e}")
+            return 0
     
     def get_load(self, worker_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -103,6 +147,8 @@ class WorkerLoadService:
         """
         批量获取 Worker 负载数据
         
+        负载以 Hash 存储（MGET 不适用），所有 HGETALL 通过一个 pipeline 在一次往返内完成。
+        
         Args:
             worker_ids: Worker ID 列表
         
@@ -110,9 +156,11 @@ class WorkerLoadService:
             {worker_id: {"cpu": float, "mem": float}} 字典
         """
         result = {}
+        if not worker_ids:
+            return result
         
         try:
-            pipe = self.redis.pipeline()
+            pipe = self.redis.pipeline(transaction=False)
             for worker_id in worker_ids:
                 pipe.hgetall(self._key(worker_id))
             
@@ -131,6 +179,9 @@ class WorkerLoadService:
     
     def delete_load(self, worker_id: int) -> bool:
         """删除 Worker 负载数据"""
+        # 先丢弃缓冲区中尚未写入的数据，避免刷新时重新写回
+        with self._pending_lock:
+            self._pending.pop(worker_id, None)
         try:
             self.redis.delete(self._key(worker_id))
             return True
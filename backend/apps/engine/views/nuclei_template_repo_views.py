@@ -13,7 +13,8 @@ API 列表：
 - DELETE /api/nuclei/repos/{id}/         删除仓库
 
 自定义 Action：
-- POST   /api/nuclei/repos/{id}/refresh/           手动 Git 同步（clone/pull）
+- POST   /api/nuclei/repos/{id}/refresh/           提交后台 Git 同步任务（clone/pull）
+- GET    /api/nuclei/repos/{id}/refresh-status/    查询后台同步任务状态
 - GET    /api/nuclei/repos/{id}/templates/tree/    获取当前本地模板目录树（不自动同步）
 - GET    /api/nuclei/repos/{id}/templates/content/ 获取单个模板内容（只读）
 
@@ -91,17 +92,17 @@ class NucleiTemplateRepoViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"], url_path="refresh")
     def refresh(self, request: Request, pk: str | None = None) -> Response:
-        """手动触发 Git 同步
+        """手动触发 Git 同步（后台执行）
 
         POST /api/nuclei/repos/{id}/refresh/
 
-        执行 git clone（首次）或 git pull（后续）。
-        同步成功后更新 last_synced_at。
+        git clone（首次）或 git pull（后续）耗时可能较长，这里只提交后台任务并立即返回，
+        前端通过 refresh-status 接口轮询同步结果。
 
         Returns:
-            200: {"message": "刷新成功", "result": {...}}
+            202: {"message": "同步任务已提交", "taskId": "..."}
             400: {"message": "无效的仓库 ID"} 或 {"message": "仓库不存在"}
-            500: {"message": "刷新仓库失败"}
+            500: {"message": "提交同步任务失败"}
         """
         # 解析仓库 ID
         try:
@@ -111,14 +112,34 @@ class NucleiTemplateRepoViewSet(viewsets.ModelViewSet):
 
         # 调用 Service 层
         try:
-            result = self.service.refresh_repo(repo_id)
+            task_id = self.service.submit_refresh(repo_id)
         except ValidationError as exc:
             return Response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as exc:  # noqa: BLE001
-            logger.error("刷新 Nuclei 模板仓库失败: %s", exc, exc_info=True)
-            return Response({"message": f"刷新仓库失败: {exc}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            logger.error("提交 Nuclei 模板仓库同步任务失败: %s", exc, exc_info=True)
+            return Response({"message": f"提交同步任务失败: {exc}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response({"message": "刷新成功", "result": result}, status=status.HTTP_200_OK)
+        return Response({"message": "同步任务已提交", "taskId": task_id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["get"], url_path="refresh-status")
+    def refresh_status(self, request: Request, pk: str | None = None) -> Response:
+        """查询后台同步任务状态
+
+        GET /api/nuclei/repos/{id}/refresh-status/?task=<taskId>
+
+        Returns:
+            200: {"taskId", "repoId", "status": "running" | "success" | "failed", "result", "error"}
+            400: {"message": "缺少 task 参数"}
+            404: {"message": "同步任务不存在"}
+        """
+        task_id = (request.query_params.get("task", "") or "").strip()
+        if not task_id:
+            return Response({"message": "缺少 task 参数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        task = self.service.get_refresh_status(task_id)
+        if task is None or str(task["repoId"]) != str(pk):
+            return Response({"message": "同步任务不存在"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(task)
 
     # ==================== 自定义 Action: 模板只读浏览 ====================
 
@@ -1,9 +1,10 @@
 """字典管理 API Views"""
 
+import asyncio
 import os
 
 from django.core.exceptions import ValidationError
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -13,6 +14,24 @@ from apps.engine.serializers.wordlist_serializer import WordlistSerializer
 from apps.engine.services.wordlist_service import WordlistService
 
 
+# raw 方式返回字典内容时每次读取的块大小
+_RAW_CHUNK_SIZE = 1 << 20
+
+
+async def _iter_file_async(file_path: str):
+    """按块异步读取文件（ASGI 下逐块发送；读取在线程中执行，不阻塞事件循环）
+
+    Django 在 ASGI 下会把同步迭代器整体读入列表再发送，因此这里使用异步生成器；
+    响应结束或客户端断开时生成器被关闭，文件句柄随之关闭。
+    """
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, _RAW_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
 class WordlistViewSet(viewsets.ViewSet):
     """字典管理 ViewSet"""
 
@@ -100,8 +119,9 @@ class WordlistViewSet(viewsets.ViewSet):
     def content(self, request, pk=None):
         """获取或更新字典文件内容
 
-        GET: 返回字典文件的文本内容
-        PUT: 更新字典文件内容，重新计算 hash
+        GET: 返回字典文件的文本内容（JSON，文件超过 5MB 返回 413）
+             带 ?raw=1 时以 text/plain 按块流式返回原始文件（异步迭代，不整体读入内存）
+        PUT: 更新字典文件内容，重新计算 hash（内容超过 5MB 返回 413）
         """
         try:
             wordlist_id = int(pk)
@@ -109,7 +129,22 @@ class WordlistViewSet(viewsets.ViewSet):
             return Response({"error": "无效的 ID"}, status=status.HTTP_400_BAD_REQUEST)
 
         if request.method == "GET":
-            content = self.service.get_wordlist_content(wordlist_id)
+            if request.query_params.get("raw") in ("1", "true"):
+                file_path = self.service.get_wordlist_file_path(wordlist_id)
+                if not file_path:
+                    return Response({"error": "字典不存在或文件无法读取"}, status=status.HTTP_404_NOT_FOUND)
+                return StreamingHttpResponse(
+                    _iter_file_async(file_path),
+                    content_type="text/plain; charset=utf-8",
+                )
+
+            try:
+                content = self.service.get_wordlist_content(wordlist_id)
+            except ValidationError as exc:
+                return Response(
+                    {"error": "; ".join(exc.messages)},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
             if content is None:
                 return Response({"error": "字典不存在或文件无法读取"}, status=status.HTTP_404_NOT_FOUND)
             return Response({"content": content})
@@ -119,9 +154,40 @@ class WordlistViewSet(viewsets.ViewSet):
             if content is None:
                 return Response({"error": "缺少 content 参数"}, status=status.HTTP_400_BAD_REQUEST)
 
-            wordlist = self.service.update_wordlist_content(wordlist_id, content)
+            if not isinstance(content, str):
+                return Response({"error": "content 必须是字符串"}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                wordlist = self.service.update_wordlist_content(wordlist_id, content)
+            except ValidationError as exc:
+                return Response(
+                    {"error": "; ".join(exc.messages)},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
             if not wordlist:
                 return Response({"error": "字典不存在或更新失败"}, status=status.HTTP_404_NOT_FOUND)
 
             serializer = WordlistSerializer(wordlist)
             return Response(serializer.data)
+
+    @action(detail=True, methods=["post"], url_path="append")
+    def append(self, request, pk=None):
+        """向字典末尾追加行
+
+        Body: {"lines": ["a", "b", ...]}
+        """
+        try:
+            wordlist_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({"error": "无效的 ID"}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = request.data.get("lines")
+        if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+            return Response({"error": "lines 必须是字符串数组"}, status=status.HTTP_400_BAD_REQUEST)
+
+        wordlist = self.service.append_lines(wordlist_id, lines)
+        if not wordlist:
+            return Response({"error": "字典不存在或更新失败"}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = WordlistSerializer(wordlist)
+        return Response(serializer.data)
@@ -1,20 +1,49 @@
 """
 Worker 节点 Views
 """
+import functools
 import os
 import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+from django.conf import settings
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from apps.engine.models import WorkerNode
 from apps.engine.serializers import WorkerNodeSerializer
 from apps.engine.services import WorkerService
+from apps.engine.services.worker_load_service import worker_load_service
 from apps.common.signals import worker_delete_failed
 
 logger = logging.getLogger(__name__)
 
+# 远程卸载线程池：限制并发 SSH 连接数，复用线程
+_uninstall_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="worker-uninstall")
+
+# 通知线程池：信号接收器（写通知、推送 WebSocket）在此执行，不占用卸载线程
+_notify_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-notify")
+
+
+def _send_delete_failed(sender, worker_name: str, message: str) -> None:
+    """发送 worker_delete_failed 信号，单个接收器异常不影响其它接收器"""
+    for receiver, result in worker_delete_failed.send_robust(
+        sender=sender,
+        worker_name=worker_name,
+        message=message
+    ):
+        if isinstance(result, Exception):
+            logger.error("worker_delete_failed 接收器 %r 执行失败: %s", receiver, result)
+
+
+def _notify_delete_failed(sender, worker_name: str, message: str) -> None:
+    """异步发送 worker_delete_failed 信号，调用方立即返回"""
+    _notify_pool.submit(_send_delete_failed, sender, worker_name, message)
+
 
 class WorkerNodeViewSet(viewsets.ModelViewSet):
     """
@@ -40,18 +69,19 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
         """通过服务层获取 Worker 查询集"""
         return self.worker_service.get_all_workers()
     
-    def get_serializer_context(self):
-        """传入批量查询的 Redis 负载数据，避免 N+1 查询"""
-        context = super().get_serializer_context()
-        
-        # 仅在 list 操作时批量预加载
-        if self.action == 'list':
-            from apps.engine.services.worker_load_service import worker_load_service
-            queryset = self.get_queryset()
-            worker_ids = list(queryset.values_list('id', flat=True))
-            context['loads'] = worker_load_service.get_all_loads(worker_ids)
-        
-        return context
+    def get_serializer(self, *args, **kwargs):
+        """list 时按当前页的 Worker 批量预加载 Redis 负载数据，避免 N+1 查询
+        
+        WorkerNode 没有外键/反向关系需要 select_related/prefetch_related，
+        这里直接复用已取出的当前页对象计算 ID，省去额外的 values_list 全表查询。
+        """
+        if self.action == 'list' and args:
+            workers = list(args[0])
+            context = self.get_serializer_context()
+            context['loads'] = worker_load_service.get_all_loads([w.id for w in workers])
+            kwargs['context'] = context
+            args = (workers, *args[1:])
+        return super().get_serializer(*args, **kwargs)
     
     def destroy(self, request, *args, **kwargs):
         """
@@ -73,7 +103,6 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
         password = worker.password
         
         # 1. 删除 Redis 中的负载数据
-        from apps.engine.services.worker_load_service import worker_load_service
         worker_load_service.delete_load(worker_id)
         
         # 2. 删除数据库记录（立即生效，前端刷新时不会再看到）
@@ -93,22 +122,14 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
                     logger.info(f"Worker {worker_name} 远程卸载成功")
                 else:
                     logger.warning(f"Worker {worker_name} 远程卸载: {message}")
-                    # 卸载失败时发送通知
-                    worker_delete_failed.send(
-                        sender=self.__class__,
-                        worker_name=worker_name,
-                        message=message
-                    )
+                    # 卸载失败时发送通知（异步，卸载线程立即归还线程池）
+                    _notify_delete_failed(self.__class__, worker_name, message)
             except Exception as e:
                 logger.error(f"Worker {worker_name} 远程卸载失败: {e}")
-                worker_delete_failed.send(
-                    sender=self.__class__,
-                    worker_name=worker_name,
-                    message=str(e)
-                )
+                _notify_delete_failed(self.__class__, worker_name, str(e))
         
-        # 2. 后台线程执行远程卸载（不阻塞响应）
-        threading.Thread(target=_async_remote_uninstall, daemon=True).start()
+        # 2. 提交到卸载线程池执行远程卸载（不阻塞响应）
+        _uninstall_pool.submit(_async_remote_uninstall)
         
         # 3. 立即返回成功
         return Response(
@@ -146,21 +167,25 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
         │ 版本匹配                    │ updating/outdated → online            │
         └─────────────────────────────┴───────────────────────────────────────┘
         """
-        from apps.engine.services.worker_load_service import worker_load_service
-        from django.conf import settings
-        
-        worker = self.get_object()
+        try:
+            worker_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({'error': '无效的 Worker ID'}, status=status.HTTP_400_BAD_REQUEST)
+        # 已删除/不存在的 Worker 不再写入 Redis 负载（主键索引 EXISTS，无需加载整行）
+        if not WorkerNode.objects.filter(pk=worker_id).exists():
+            return Response({'error': 'Worker 不存在'}, status=status.HTTP_404_NOT_FOUND)
         info = request.data if request.data else {}
         
         # 1. 写入 Redis（实时负载数据，TTL=60秒）
         cpu = info.get('cpu_percent', 0)
         mem = info.get('memory_percent', 0)
-        worker_load_service.update_load(worker.id, cpu, mem)
+        worker_load_service.update_load(worker_id, cpu, mem)
         
-        # 2. 首次心跳：更新状态为 online
-        if worker.status not in ('online', 'offline'):
-            worker.status = 'online'
-            worker.save(update_fields=['status'])
+        # 2. 首次心跳 / 版本恢复：非 online/offline 状态统一改为 online
+        #    单条条件 UPDATE，常态（已 online）下不命中任何行，无需先 SELECT
+        WorkerNode.objects.filter(pk=worker_id).exclude(
+            status__in=('online', 'offline')
+        ).update(status='online')
         
         # 3. 版本检查：比较 agent 版本与 server 版本
         agent_version = info.get('version', '')
@@ -171,6 +196,8 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
             # 版本不匹配时通知 agent 更新
             need_update = agent_version != server_version
             if need_update:
+                # 仅在版本不匹配时才加载 Worker 对象
+                worker = self.get_object()
                 logger.info(
                     f"Worker {worker.name} 版本不匹配: agent={agent_version}, server={server_version}"
                 )
@@ -184,11 +211,7 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
                     if worker.status != 'outdated':
                         worker.status = 'outdated'
                         worker.save(update_fields=['status'])
-            else:
-                # 版本匹配，确保状态为 online
-                if worker.status in ('updating', 'outdated'):
-                    worker.status = 'online'
-                    worker.save(update_fields=['status'])
+            # 版本匹配时 updating/outdated 已由步骤 2 改回 online
         
         return Response({
             'status': 'ok',
@@ -202,10 +225,7 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
         
         使用 Redis 锁防止重复触发（同一 worker 60秒内只触发一次）
         """
-        import redis
-        from django.conf import settings as django_settings
-        
-        redis_url = f"redis://{django_settings.REDIS_HOST}:{django_settings.REDIS_PORT}/{django_settings.REDIS_DB}"
+        redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
         redis_client = redis.from_url(redis_url)
         lock_key = f"agent_update_lock:{worker.id}"
         
@@ -230,7 +250,7 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
                 logger.info(f"开始远程更新 Worker {worker_name} 到 {target_version}")
                 
                 # 构建更新命令：拉取新镜像并重启 agent
-                docker_user = getattr(django_settings, 'DOCKER_USER', 'yyhuni')
+                docker_user = getattr(settings, 'DOCKER_USER', 'yyhuni')
                 update_cmd = f'''
                     docker pull {docker_user}/xingrin-agent:{target_version} && \
                     docker stop xingrin-agent 2>/dev/null || true && \
@@ -238,7 +258,7 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
                     docker run -d --pull=always \
                         --name xingrin-agent \
                         --restart always \
-                        -e HEARTBEAT_API_URL="https://{django_settings.PUBLIC_HOST}:{getattr(django_settings, 'PUBLIC_PORT', '8083')}" \
+                        -e HEARTBEAT_API_URL="https://{settings.PUBLIC_HOST}:{getattr(settings, 'PUBLIC_PORT', '8083')}" \
                         -e WORKER_ID="{worker_id}" \
                         -e IMAGE_TAG="{target_version}" \
                         -v /proc:/host/proc:ro \
@@ -274,7 +294,6 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
     def _set_worker_status(self, worker_id: int, status: str):
         """更新 Worker 状态（用于后台线程）"""
         try:
-            from apps.engine.models import WorkerNode
             WorkerNode.objects.filter(id=worker_id).update(status=status)
         except Exception as e:
             logger.error(f"更新 Worker {worker_id} 状态失败: {e}")
@@ -341,61 +360,70 @@ class WorkerNodeViewSet(viewsets.ModelViewSet):
         配置逻辑:
             - 本地 Worker (is_local=true): db_host=postgres, redis=redis:6379
             - 远程 Worker (is_local=false): db_host=PUBLIC_HOST, redis=PUBLIC_HOST:6379
-        """
-        from django.conf import settings
-        import logging
-        logger = logging.getLogger(__name__)
         
+        配置内容在进程生命周期内不变，按 is_local 缓存（见 _build_config_payload）。
+        """
         # 从请求参数获取 Worker 身份（由 Worker 自己声明）
         # 不再依赖 IP 判断，避免不同网络环境下的兼容性问题
         is_local_param = request.query_params.get('is_local', '').lower()
         is_local_worker = is_local_param == 'true'
         
-        # 根据请求来源返回不同的数据库地址
-        db_host = settings.DATABASES['default']['HOST']
-        _is_internal_db = db_host in ('postgres', 'localhost', '127.0.0.1')
-        
-        logger.info(
-            "Worker 配置请求 - is_local_param: %s, is_local_worker: %s, db_host: %s, is_internal_db: %s",
-            is_local_param, is_local_worker, db_host, _is_internal_db
-        )
-        
-        if _is_internal_db:
-            # 本地数据库场景
-            if is_local_worker:
-                # 本地 Worker：直接用 Docker 内部服务名
-                worker_db_host = 'postgres'
-                worker_redis_url = 'redis://redis:6379/0'
-            else:
-                # 远程 Worker：通过公网 IP 访问
-                public_host = settings.PUBLIC_HOST
-                if public_host in ('server', 'localhost', '127.0.0.1'):
-                    logger.warning("远程 Worker 请求配置，但 PUBLIC_HOST=%s 不是有效的公网地址", public_host)
-                worker_db_host = public_host
-                worker_redis_url = f'redis://{public_host}:6379/0'
+        return Response(_build_config_payload(is_local_worker))
+
+
+@functools.lru_cache(maxsize=2)
+def _build_config_payload(is_local_worker: bool) -> dict:
+    """
+    构建任务容器配置（按 Worker 身份缓存）
+    
+    配置只依赖 settings 和环境变量，修改后需重启服务才会生效，
+    因此每个进程内只需构建一次（本地/远程各一份）。
+    """
+    # 根据请求来源返回不同的数据库地址
+    db_host = settings.DATABASES['default']['HOST']
+    _is_internal_db = db_host in ('postgres', 'localhost', '127.0.0.1')
+    
+    logger.info(
+        "构建 Worker 配置 - is_local_worker: %s, db_host: %s, is_internal_db: %s",
+        is_local_worker, db_host, _is_internal_db
+    )
+    
+    if _is_internal_db:
+        # 本地数据库场景
+        if is_local_worker:
+            # 本地 Worker：直接用 Docker 内部服务名
+            worker_db_host = 'postgres'
+            worker_redis_url = 'redis://redis:6379/0'
         else:
-            # 远程数据库场景：所有 Worker 都用 DB_HOST
-            worker_db_host = db_host
-            worker_redis_url = getattr(settings, 'WORKER_REDIS_URL', 'redis://redis:6379/0')
-        
-        logger.info("返回 Worker 配置 - db_host: %s, redis_url: %s", worker_db_host, worker_redis_url)
-        
-        return Response({
-            'db': {
-                'host': worker_db_host,
-                'port': str(settings.DATABASES['default']['PORT']),
-                'name': settings.DATABASES['default']['NAME'],
-                'user': settings.DATABASES['default']['USER'],
-                'password': settings.DATABASES['default']['PASSWORD'],
-            },
-            'redisUrl': worker_redis_url,
-            'paths': {
-                'results': getattr(settings, 'CONTAINER_RESULTS_MOUNT', '/app/backend/results'),
-                'logs': getattr(settings, 'CONTAINER_LOGS_MOUNT', '/app/backend/logs'),
-            },
-            'logging': {
-                'level': os.getenv('LOG_LEVEL', 'INFO'),
-                'enableCommandLogging': os.getenv('ENABLE_COMMAND_LOGGING', 'true').lower() == 'true',
-            },
-            'debug': settings.DEBUG
-        })
+            # 远程 Worker：通过公网 IP 访问
+            public_host = settings.PUBLIC_HOST
+            if public_host in ('server', 'localhost', '127.0.0.1'):
+                logger.warning("远程 Worker 请求配置，但 PUBLIC_HOST=%s 不是有效的公网地址", public_host)
+            worker_db_host = public_host
+            worker_redis_url = f'redis://{public_host}:6379/0'
+    else:
+        # 远程数据库场景：所有 Worker 都用 DB_HOST
+        worker_db_host = db_host
+        worker_redis_url = getattr(settings, 'WORKER_REDIS_URL', 'redis://redis:6379/0')
+    
+    logger.info("Worker 配置 - db_host: %s, redis_url: %s", worker_db_host, worker_redis_url)
+    
+    return {
+        'db': {
+            'host': worker_db_host,
+            'port': str(settings.DATABASES['default']['PORT']),
+            'name': settings.DATABASES['default']['NAME'],
+            'user': settings.DATABASES['default']['USER'],
+            'password': settings.DATABASES['default']['PASSWORD'],
+        },
+        'redisUrl': worker_redis_url,
+        'paths': {
+            'results': getattr(settings, 'CONTAINER_RESULTS_MOUNT', '/app/backend/results'),
+            'logs': getattr(settings, 'CONTAINER_LOGS_MOUNT', '/app/backend/logs'),
+        },
+        'logging': {
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+            'enableCommandLogging': os.getenv('ENABLE_COMMAND_LOGGING', 'true').lower() == 'true',
+        },
+        'debug': settings.DEBUG
+    }
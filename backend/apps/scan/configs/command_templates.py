@@ -116,6 +116,9 @@ SITE_SCAN_COMMANDS = {
 DIRECTORY_SCAN_COMMANDS = {
     'ffuf': {
         'base': "ffuf -u '{url}FUZZ' -se -ac -sf -json -w '{wordlist}'",  
+        # 多站点模式（multi-site: true）：一次 ffuf 进程扫描全部站点，字典只解析一次
+        # -ach 按主机自动校准；不加 -sf，避免单个站点触发 403 阈值而中止所有站点
+        'multi_site_base': "ffuf -u 'SITEFUZZ' -se -ac -ach -json -w '{sites_file}:SITE' -w '{wordlist}:FUZZ'",
         'optional': {
             'delay': '-p {delay}',
             'threads': '-t {threads}',
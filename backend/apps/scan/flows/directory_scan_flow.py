@@ -16,13 +16,14 @@ from apps.common.prefect_django_setup import setup_django_for_prefect
 from prefect import flow
 from prefect.task_runners import ThreadPoolTaskRunner
 
-import hashlib
+import contextvars
 import logging
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from apps.scan.tasks.directory_scan import (
     export_sites_task,
@@ -33,19 +34,30 @@ from apps.scan.handlers.scan_flow_handlers import (
     on_scan_flow_completed,
     on_scan_flow_failed,
 )
-from apps.scan.utils import config_parser, build_scan_command, ensure_wordlist_local
+from apps.scan.configs.command_templates import get_command_template
+from apps.scan.utils import (
+    config_parser,
+    build_scan_command,
+    build_scan_command_prep,
+    count_file_lines,
+    ensure_wordlist_local,
+)
 
 logger = logging.getLogger(__name__)
 
 # 默认最大并发数
 DEFAULT_MAX_WORKERS = 5
 
+# 日志分隔线
+_BANNER_LINE = "=" * 60
+
 
 def calculate_directory_scan_timeout(
     tool_config: dict,
     base_per_word: float = 1.0,
     min_timeout: int = 60,
-    max_timeout: int = 7200
+    max_timeout: int = 7200,
+    avg_bytes_per_line: Optional[float] = None
 ) -> int:
     """
     根据字典行数计算目录扫描超时时间
@@ -58,6 +70,8 @@ def calculate_directory_scan_timeout(
         base_per_word: 每个单词的基础时间（秒），默认 1.0秒
         min_timeout: 最小超时时间（秒），默认 60秒
         max_timeout: 最大超时时间（秒），默认 7200秒（2小时）
+        avg_bytes_per_line: 可选，每行平均字节数。指定时直接用 文件大小 / 平均行长 估算行数，
+            只需一次 stat，不读取文件内容；默认 None 表示精确统计
     
     Returns:
         int: 计算出的超时时间（秒），范围：60 ~ 7200
@@ -79,20 +93,19 @@ def calculate_directory_scan_timeout(
         # 展开用户目录（~）
         wordlist_path = os.path.expanduser(wordlist_path)
         
-        # 检查文件是否存在
-        if not os.path.exists(wordlist_path):
+        # 检查文件是否存在（stat 结果同时作为行数缓存键）
+        try:
+            st = os.stat(wordlist_path)
+        except FileNotFoundError:
             logger.warning("字典文件不存在: %s，使用默认超时: %d秒", wordlist_path, min_timeout)
             return min_timeout
         
-        # 使用 wc -l 快速统计字典行数
-        result = subprocess.run(
-            ['wc', '-l', wordlist_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        # wc -l 输出格式：行数 + 空格 + 文件名
-        line_count = int(result.stdout.strip().split()[0])
+        if avg_bytes_per_line:
+            # 快速估算：只依赖 stat 结果
+            line_count = int(st.st_size // avg_bytes_per_line)
+        else:
+            # 进程内按块统计（按 stat 缓存，无需 fork wc 子进程）
+            line_count = count_file_lines(wordlist_path)
         
         # 计算超时时间
         timeout = int(line_count * base_per_word)
@@ -107,13 +120,10 @@ def calculate_directory_scan_timeout(
         
         return timeout
         
-    except subprocess.CalledProcessError as e:
+    except OSError as e:
         logger.error("统计字典行数失败: %s", e)
         # 失败时返回默认超时
         return min_timeout
-    except (ValueError, IndexError) as e:
-        logger.error("解析字典行数失败: %s", e)
-        return min_timeout
     except Exception as e:
         logger.error("计算超时时间异常: %s", e)
         return min_timeout
@@ -143,17 +153,23 @@ def _get_max_workers(tool_config: dict, default: int = DEFAULT_MAX_WORKERS) -> i
 
 
 
-def _export_site_urls(target_id: int, target_name: str, directory_scan_dir: Path) -> tuple[str, int]:
+def _export_site_urls(
+    target_id: int,
+    target_name: str,
+    directory_scan_dir: Path
+) -> tuple[str, int, Tuple[str, ...]]:
     """
     导出目标下的所有站点 URL 到文件（支持懒加载）
     
+    导出时同时收集站点列表并返回，扫描阶段直接使用，无需再回读 sites.txt。
+    
     Args:
         target_id: 目标 ID
-        target_name: 目标名称（用于懒加载创建默认站点）
+        target_name: 目标名称（仅用于日志）
         directory_scan_dir: 目录扫描目录
         
     Returns:
-        tuple: (sites_file, site_count)
+        tuple: (sites_file, site_count, sites)
         
     Raises:
         ValueError: 站点数量为 0
@@ -165,7 +181,7 @@ def _export_site_urls(target_id: int, target_name: str, directory_scan_dir: Path
         target_id=target_id,
         output_file=sites_file,
         batch_size=1000,  # 每次读取 1000 条，优化内存占用
-        target_name=target_name  # 传入 target_name 用于懒加载
+        collect_sites=True
     )
     
     site_count = export_result['total_count']
@@ -181,12 +197,13 @@ def _export_site_urls(target_id: int, target_name: str, directory_scan_dir: Path
         # 不抛出异常，由上层决定如何处理
         # raise ValueError("目标下没有站点，无法执行目录扫描")
     
-    return export_result['output_file'], site_count
+    sites = tuple(s for s in map(str.strip, export_result['sites']) if s)
+    return export_result['output_file'], site_count, sites
 
 
 def _run_scans_sequentially(
     enabled_tools: dict,
-    sites_file: str,
+    sites: Tuple[str, ...],
     directory_scan_dir: Path,
     scan_id: int,
     target_id: int,
@@ -194,11 +211,14 @@ def _run_scans_sequentially(
     target_name: str
 ) -> tuple[int, int, list]:
     """
-    串行执行目录扫描任务（支持多工具）- 已废弃，保留用于兼容
+    逐工具执行目录扫描任务（支持多工具）- 已废弃，保留用于兼容
+    
+    当前 Flow 不再调用本函数（实际执行路径为 _run_scans_concurrently）。
+    每个工具内部使用 ThreadPoolExecutor 并发扫描站点，并发数取自 max_workers 配置。
     
     Args:
         enabled_tools: 启用的工具配置字典
-        sites_file: 站点文件路径
+        sites: 站点 URL 列表（由 _export_site_urls 返回，所有工具共用）
         directory_scan_dir: 目录扫描目录
         scan_id: 扫描任务 ID
         target_id: 目标 ID
@@ -208,25 +228,19 @@ def _run_scans_sequentially(
     Returns:
         tuple: (total_directories, processed_sites, failed_sites)
     """
-    # 读取站点列表
-    sites = []
-    with open(sites_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            site_url = line.strip()
-            if site_url:
-                sites.append(site_url)
+    total_sites = len(sites)
     
-    logger.info("准备扫描 %d 个站点，使用工具: %s", len(sites), ', '.join(enabled_tools.keys()))
+    logger.info("准备扫描 %d 个站点，使用工具: %s", total_sites, ', '.join(enabled_tools.keys()))
     
     total_directories = 0
-    processed_sites_set = set()  # 使用 set 避免重复计数
+    processed_count = 0
     failed_sites = []
     
     # 遍历每个工具
     for tool_name, tool_config in enabled_tools.items():
-        logger.info("="*60)
+        logger.info(_BANNER_LINE)
         logger.info("使用工具: %s", tool_name)
-        logger.info("="*60)
+        logger.info(_BANNER_LINE)
 
         # 如果配置了 wordlist_name，则先确保本地存在对应的字典文件（含 hash 校验）
         wordlist_name = tool_config.get('wordlist_name')
@@ -240,49 +254,42 @@ def _run_scans_sequentially(
                 failed_sites.extend(sites)
                 continue
         
-        # 逐个站点执行扫描
-        for idx, site_url in enumerate(sites, 1):
-            logger.info(
-                "[%d/%d] 开始扫描站点: %s (工具: %s)",
-                idx, len(sites), site_url, tool_name
-            )
-            
-            # 使用统一的命令构建器
-            try:
-                command = build_scan_command(
-                    tool_name=tool_name,
-                    scan_type='directory_scan',
-                    command_params={
-                        'url': site_url
-                    },
-                    tool_config=tool_config
-                )
-            except Exception as e:
-                logger.error(
-                    "✗ [%d/%d] 构建 %s 命令失败: %s - 站点: %s",
-                    idx, len(sites), tool_name, e, site_url
-                )
-                failed_sites.append(site_url)
-                continue
-            
-            # 单个站点超时：从配置中获取（支持 'auto' 动态计算）
-            # ffuf 逐个站点扫描，timeout 就是单个站点的超时时间
-            site_timeout = tool_config.get('timeout', 300)
-            if site_timeout == 'auto':
-                # 动态计算超时时间（基于字典行数）
-                site_timeout = calculate_directory_scan_timeout(tool_config)
-                logger.info(f"✓ 工具 {tool_name} 动态计算 timeout: {site_timeout}秒")
-            
-            # 生成日志文件路径
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            log_file = directory_scan_dir / f"{tool_name}_{timestamp}_{idx}.log"
-            
-            try:
-                # 直接调用 task（串行执行）
-                result = run_and_stream_save_directories_task(
+        # 单个站点超时：从配置中获取（支持 'auto' 动态计算）
+        # ffuf 逐个站点扫描，timeout 就是单个站点的超时时间；字典不变，每个工具只计算一次
+        site_timeout = tool_config.get('timeout', 300)
+        if site_timeout == 'auto':
+            # 动态计算超时时间（基于字典行数）
+            site_timeout = calculate_directory_scan_timeout(tool_config)
+            logger.info("✓ 工具 %s 动态计算 timeout: %d秒", tool_name, site_timeout)
+        
+        # 日志文件名前缀（每个工具生成一次时间戳，格式与 _run_scans_concurrently 一致）
+        log_prefix = f"{tool_name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        
+        # 每个工具只构建一次命令模板，逐站点仅替换 url
+        try:
+            build_command = build_scan_command_prep(tool_name, 'directory_scan', tool_config)
+        except Exception as e:
+            logger.error("✗ 构建 %s 命令失败: %s", tool_name, e)
+            failed_sites.extend(sites)
+            continue
+        
+        # 准备每个站点的扫描参数
+        scan_params_list = [
+            (idx, site_url, build_command(site_url), directory_scan_dir / f"{log_prefix}_{idx}.log")
+            for idx, site_url in enumerate(sites, 1)
+        ]
+        
+        # 线程池并发执行：ffuf 为外部进程（I/O 密集），同时保持 max_workers 个扫描在执行
+        max_workers = _get_max_workers(tool_config)
+        completed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 每个线程复制一份当前上下文，Task 仍挂在本 Flow 下作为 task run
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run,
+                    run_and_stream_save_directories_task,
                     cmd=command,
-                    tool_name=tool_name,  # 新增：工具名称
+                    tool_name=tool_name,
                     scan_id=scan_id,
                     target_id=target_id,
                     site_url=site_url,
@@ -290,108 +297,164 @@ def _run_scans_sequentially(
                     shell=True,
                     batch_size=1000,
                     timeout=site_timeout,
-                    log_file=str(log_file)  # 新增：日志文件路径
-                )
-                
-                total_directories += result.get('created_directories', 0)
-                processed_sites_set.add(site_url)  # 使用 set 记录成功的站点
-                
-                logger.info(
-                    "✓ [%d/%d] 站点扫描完成: %s - 发现 %d 个目录",
-                    idx, len(sites), site_url,
-                    result.get('created_directories', 0)
-                )
-                
-            except subprocess.TimeoutExpired as exc:
-                # 超时异常单独处理
-                failed_sites.append(site_url)
-                logger.warning(
-                    "⚠️ [%d/%d] 站点扫描超时: %s - 超时配置: %d秒\n"
-                    "注意：超时前已解析的目录数据已保存到数据库，但扫描未完全完成。",
-                    idx, len(sites), site_url, site_timeout
-                )
-            except Exception as exc:
-                # 其他异常
-                failed_sites.append(site_url)
-                logger.error(
-                    "✗ [%d/%d] 站点扫描失败: %s - 错误: %s",
-                    idx, len(sites), site_url, exc
-                )
+                    log_file=str(log_file)
+                ): (idx, site_url)
+                for idx, site_url, command, log_file in scan_params_list
+            }
             
-            # 每 10 个站点输出进度
-            if idx % 10 == 0:
-                logger.info(
-                    "进度: %d/%d (%.1f%%) - 已发现 %d 个目录",
-                    idx, len(sites), idx/len(sites)*100, total_directories
-                )
-    
-    # 计算成功和失败的站点数
-    processed_count = len(processed_sites_set)
+            for future in as_completed(futures):
+                idx, site_url = futures[future]
+                completed += 1
+                try:
+                    result = future.result()
+                    
+                    total_directories += result.get('created_directories', 0)
+                    processed_count += 1
+                    
+                    logger.info(
+                        "✓ [%d/%d] 站点扫描完成: %s - 发现 %d 个目录",
+                        idx, total_sites, site_url,
+                        result.get('created_directories', 0)
+                    )
+                    
+                except subprocess.TimeoutExpired as exc:
+                    # 超时异常单独处理
+                    failed_sites.append(site_url)
+                    logger.warning(
+                        "⚠️ [%d/%d] 站点扫描超时: %s - 超时配置: %d秒\n"
+                        "注意：超时前已解析的目录数据已保存到数据库，但扫描未完全完成。",
+                        idx, total_sites, site_url, site_timeout
+                    )
+                except Exception as exc:
+                    # 其他异常
+                    failed_sites.append(site_url)
+                    logger.error(
+                        "✗ [%d/%d] 站点扫描失败: %s - 错误: %s",
+                        idx, total_sites, site_url, exc
+                    )
+                
+                # 每完成 10 个站点输出进度
+                if completed % 10 == 0 and logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "进度: %d/%d (%.1f%%) - 已发现 %d 个目录",
+                        completed, total_sites, completed/total_sites*100, total_directories
+                    )
     
     if failed_sites:
         logger.warning(
             "部分站点扫描失败: %d/%d",
-            len(failed_sites), len(sites)
+            len(failed_sites), total_sites
         )
     
     logger.info(
-        "✓ 串行目录扫描执行完成 - 成功: %d/%d, 失败: %d, 总目录数: %d",
-        processed_count, len(sites), len(failed_sites), total_directories
+        "✓ 目录扫描执行完成 - 成功: %d/%d, 失败: %d, 总目录数: %d",
+        processed_count, total_sites, len(failed_sites), total_directories
     )
     
     return total_directories, processed_count, failed_sites
 
 
-def _generate_log_filename(tool_name: str, site_url: str, directory_scan_dir: Path) -> Path:
+def _supports_multi_site(tool_name: str, tool_config: dict) -> bool:
     """
-    生成唯一的日志文件名
+    判断工具是否启用并支持多站点模式
     
-    使用 URL 的 hash 确保并发时不会冲突
+    多站点模式需要在工具配置中开启 multi-site，且命令模板提供 multi_site_base。
+    """
+    if not tool_config.get('multi_site'):
+        return False
+    template = get_command_template('directory_scan', tool_name) or {}
+    if 'multi_site_base' not in template:
+        logger.warning("工具 %s 不支持多站点模式，回退为逐站点扫描", tool_name)
+        return False
+    return True
+
+
+def _run_multi_site_scan(
+    tool_name: str,
+    tool_config: dict,
+    sites_file: str,
+    total_sites: int,
+    site_timeout: int,
+    directory_scan_dir: Path,
+    scan_id: int,
+    target_id: int
+) -> int:
+    """
+    多站点模式：一次工具进程扫描全部站点
+    
+    ffuf 通过多字典关键字（sites.txt:SITE + wordlist:FUZZ）在单个进程内遍历
+    所有站点，字典只解析一次，省去逐站点启动进程的开销。
+    输出记录自带完整 URL，流式保存逻辑与逐站点模式相同。
     
     Args:
         tool_name: 工具名称
-        site_url: 站点 URL
+        tool_config: 工具配置
+        sites_file: 站点列表文件
+        total_sites: 站点数量
+        site_timeout: 单个站点超时时间（秒），整体超时按站点数放大
         directory_scan_dir: 目录扫描目录
+        scan_id: 扫描任务 ID
+        target_id: 目标 ID
         
     Returns:
-        Path: 日志文件路径
+        int: 发现的目录数
+        
+    Raises:
+        Exception: 命令构建或执行失败（由调用方将全部站点记为失败）
     """
-    url_hash = hashlib.md5(site_url.encode()).hexdigest()[:8]
+    command = build_scan_command(
+        tool_name=tool_name,
+        scan_type='directory_scan',
+        command_params={'sites_file': sites_file},
+        tool_config=tool_config,
+        base_key='multi_site_base'
+    )
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-    return directory_scan_dir / f"{tool_name}_{url_hash}_{timestamp}.log"
+    log_file = directory_scan_dir / f"{tool_name}_multi_site_{timestamp}.log"
+    
+    logger.info("多站点模式执行 %s - 站点数: %d", tool_name, total_sites)
+    result = run_and_stream_save_directories_task(
+        cmd=command,
+        tool_name=tool_name,
+        scan_id=scan_id,
+        target_id=target_id,
+        site_url=sites_file,
+        cwd=str(directory_scan_dir),
+        shell=True,
+        batch_size=1000,
+        timeout=site_timeout * total_sites,
+        log_file=str(log_file)
+    )
+    return result.get('created_directories', 0)
 
 
 def _run_scans_concurrently(
     enabled_tools: dict,
-    sites_file: str,
+    sites: Tuple[str, ...],
     directory_scan_dir: Path,
     scan_id: int,
     target_id: int,
     site_count: int,
-    target_name: str
+    target_name: str,
+    sites_file: Optional[str] = None
 ) -> Tuple[int, int, List[str]]:
     """
-    并发执行目录扫描任务（使用 ThreadPoolTaskRunner）
+    并发执行目录扫描任务（每个工具一个线程池，按 max_workers 滑动窗口执行站点扫描）
     
     Args:
         enabled_tools: 启用的工具配置字典
-        sites_file: 站点文件路径
+        sites: 站点 URL 列表（由 _export_site_urls 返回，所有工具共用）
         directory_scan_dir: 目录扫描目录
         scan_id: 扫描任务 ID
         target_id: 目标 ID
         site_count: 站点数量
         target_name: 目标名称（用于错误日志）
+        sites_file: 站点列表文件（多站点模式使用）
         
     Returns:
         tuple: (total_directories, processed_sites, failed_sites)
     """
-    # 读取站点列表
-    sites: List[str] = []
-    with open(sites_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            site_url = line.strip()
-            if site_url:
-                sites.append(site_url)
+    total_sites = len(sites)
     
     if not sites:
         logger.warning("站点列表为空")
@@ -399,7 +462,7 @@ def _run_scans_concurrently(
     
     logger.info(
         "准备并发扫描 %d 个站点，使用工具: %s",
-        len(sites), ', '.join(enabled_tools.keys())
+        total_sites, ', '.join(enabled_tools.keys())
     )
     
     total_directories = 0
@@ -411,9 +474,9 @@ def _run_scans_concurrently(
         # 每个工具独立获取 max_workers 配置
         max_workers = _get_max_workers(tool_config)
         
-        logger.info("="*60)
+        logger.info(_BANNER_LINE)
         logger.info("使用工具: %s (并发模式, max_workers=%d)", tool_name, max_workers)
-        logger.info("="*60)
+        logger.info(_BANNER_LINE)
 
         # 如果配置了 wordlist_name，则先确保本地存在对应的字典文件（含 hash 校验）
         wordlist_name = tool_config.get('wordlist_name')
@@ -431,55 +494,61 @@ def _run_scans_concurrently(
         site_timeout = tool_config.get('timeout', 300)
         if site_timeout == 'auto':
             site_timeout = calculate_directory_scan_timeout(tool_config)
-            logger.info(f"✓ 工具 {tool_name} 动态计算 timeout: {site_timeout}秒")
+            logger.info("✓ 工具 %s 动态计算 timeout: %d秒", tool_name, site_timeout)
         
-        # 准备所有站点的扫描参数
-        scan_params_list = []
-        for idx, site_url in enumerate(sites, 1):
+        # 多站点模式：单个进程扫描全部站点
+        if sites_file and _supports_multi_site(tool_name, tool_config):
             try:
-                command = build_scan_command(
-                    tool_name=tool_name,
-                    scan_type='directory_scan',
-                    command_params={'url': site_url},
-                    tool_config=tool_config
-                )
-                log_file = _generate_log_filename(tool_name, site_url, directory_scan_dir)
-                scan_params_list.append({
-                    'idx': idx,
-                    'site_url': site_url,
-                    'command': command,
-                    'log_file': str(log_file),
-                    'timeout': site_timeout
-                })
-            except Exception as e:
-                logger.error(
-                    "✗ [%d/%d] 构建 %s 命令失败: %s - 站点: %s",
-                    idx, len(sites), tool_name, e, site_url
+                total_directories += _run_multi_site_scan(
+                    tool_name, tool_config, sites_file, total_sites, site_timeout,
+                    directory_scan_dir, scan_id, target_id
                 )
-                failed_sites.append(site_url)
+                processed_sites_count += total_sites
+            except Exception as exc:
+                logger.error("✗ 工具 %s 多站点扫描失败: %s", tool_name, exc)
+                failed_sites.extend(sites)
+            continue
+        
+        # 每个工具只构建一次命令模板，逐站点仅替换 url
+        try:
+            build_command = build_scan_command_prep(tool_name, 'directory_scan', tool_config)
+        except Exception as e:
+            logger.error("✗ 构建 %s 命令失败: %s", tool_name, e)
+            failed_sites.extend(sites)
+            continue
+        
+        # 日志文件名前缀每个工具只生成一次时间戳，逐站点以序号区分（同一工具内唯一）
+        log_prefix = str(directory_scan_dir / f"{tool_name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+        
+        # 准备所有站点的扫描参数
+        scan_params_list = [
+            {
+                'idx': idx,
+                'site_url': site_url,
+                'command': build_command(site_url),
+                'log_file': f"{log_prefix}_{idx}.log",
+                'timeout': site_timeout
+            }
+            for idx, site_url in enumerate(sites, 1)
+        ]
         
         if not scan_params_list:
             logger.warning("没有有效的扫描任务")
             continue
         
         # ============================================================
-        # 分批执行策略：控制实际并发的 ffuf 进程数
+        # 滑动窗口执行：线程池同时保持 max_workers 个 ffuf 进程在运行，
+        # 任一站点完成即启动下一个，不必等待同批最慢的站点
         # ============================================================
         total_tasks = len(scan_params_list)
-        logger.info("开始分批执行 %d 个扫描任务（每批 %d 个）...", total_tasks, max_workers)
-        
-        batch_num = 0
-        for batch_start in range(0, total_tasks, max_workers):
-            batch_end = min(batch_start + max_workers, total_tasks)
-            batch_params = scan_params_list[batch_start:batch_end]
-            batch_num += 1
-            
-            logger.info("执行第 %d 批任务（%d-%d/%d）...", batch_num, batch_start + 1, batch_end, total_tasks)
-            
-            # 提交当前批次的任务（非阻塞，立即返回 future）
-            futures = []
-            for params in batch_params:
-                future = run_and_stream_save_directories_task.submit(
+        logger.info("开始执行 %d 个扫描任务（并发 %d）...", total_tasks, max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 每个线程复制一份当前上下文，Task 仍挂在本 Flow 下作为 task run
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run,
+                    run_and_stream_save_directories_task,
                     cmd=params['command'],
                     tool_name=tool_name,
                     scan_id=scan_id,
@@ -490,20 +559,21 @@ def _run_scans_concurrently(
                     batch_size=1000,
                     timeout=params['timeout'],
                     log_file=params['log_file']
-                )
-                futures.append((params['idx'], params['site_url'], future))
+                ): (params['idx'], params['site_url'])
+                for params in scan_params_list
+            }
             
-            # 等待当前批次所有任务完成（阻塞，确保本批完成后再启动下一批）
-            for idx, site_url, future in futures:
+            for future in as_completed(futures):
+                idx, site_url = futures[future]
                 try:
-                    result = future.result()  # 阻塞等待单个任务完成
+                    result = future.result()
                     directories_found = result.get('created_directories', 0)
                     total_directories += directories_found
                     processed_sites_count += 1
                     
                     logger.info(
                         "✓ [%d/%d] 站点扫描完成: %s - 发现 %d 个目录",
-                        idx, len(sites), site_url, directories_found
+                        idx, total_sites, site_url, directories_found
                     )
                     
                 except Exception as exc:
@@ -511,24 +581,24 @@ def _run_scans_concurrently(
                     if 'timeout' in str(exc).lower() or isinstance(exc, subprocess.TimeoutExpired):
                         logger.warning(
                             "⚠️ [%d/%d] 站点扫描超时: %s - 错误: %s",
-                            idx, len(sites), site_url, exc
+                            idx, total_sites, site_url, exc
                         )
                     else:
                         logger.error(
                             "✗ [%d/%d] 站点扫描失败: %s - 错误: %s",
-                            idx, len(sites), site_url, exc
+                            idx, total_sites, site_url, exc
                         )
     
     # 输出汇总信息
     if failed_sites:
         logger.warning(
             "部分站点扫描失败: %d/%d",
-            len(failed_sites), len(sites)
+            len(failed_sites), total_sites
         )
     
     logger.info(
         "✓ 并发目录扫描执行完成 - 成功: %d/%d, 失败: %d, 总目录数: %d",
-        processed_sites_count, len(sites), len(failed_sites), total_directories
+        processed_sites_count, total_sites, len(failed_sites), total_directories
     )
     
     return total_directories, processed_sites_count, failed_sites
@@ -598,12 +668,8 @@ def directory_scan_flow(
     """
     try:
         logger.info(
-            "="*60 + "\n" +
-            "开始目录扫描\n" +
-            f"  Scan ID: {scan_id}\n" +
-            f"  Target: {target_name}\n" +
-            f"  Workspace: {scan_workspace_dir}\n" +
-            "="*60
+            "%s\n开始目录扫描\n  Scan ID: %s\n  Target: %s\n  Workspace: %s\n%s",
+            _BANNER_LINE, scan_id, target_name, scan_workspace_dir, _BANNER_LINE
         )
         
         # 参数验证
@@ -623,7 +689,7 @@ def directory_scan_flow(
         directory_scan_dir = setup_scan_directory(scan_workspace_dir, 'directory_scan')
         
         # Step 1: 导出站点 URL（支持懒加载）
-        sites_file, site_count = _export_site_urls(target_id, target_name, directory_scan_dir)
+        sites_file, site_count, sites = _export_site_urls(target_id, target_name, directory_scan_dir)
         
         if site_count == 0:
             logger.warning("目标下没有站点，跳过目录扫描")
@@ -652,12 +718,13 @@ def directory_scan_flow(
         logger.info("Step 3: 并发执行扫描工具并实时保存结果")
         total_directories, processed_sites, failed_sites = _run_scans_concurrently(
             enabled_tools=enabled_tools,
-            sites_file=sites_file,
+            sites=sites,
             directory_scan_dir=directory_scan_dir,
             scan_id=scan_id,
             target_id=target_id,
             site_count=site_count,
-            target_name=target_name
+            target_name=target_name,
+            sites_file=sites_file
         )
         
         # 检查是否所有站点都失败
@@ -665,7 +732,7 @@ def directory_scan_flow(
             logger.warning("所有站点扫描均失败 - 总站点数: %d, 失败数: %d", site_count, len(failed_sites))
             # 不抛出异常，让扫描继续
         
-        logger.info("="*60 + "\n✓ 目录扫描完成\n" + "="*60)
+        logger.info("%s\n✓ 目录扫描完成\n%s", _BANNER_LINE, _BANNER_LINE)
         
         return {
             'success': True,
@@ -6,12 +6,15 @@
 职责：
 - 使用 FlowOrchestrator 解析 YAML 配置
 - 在 Prefect Flow 中执行子 Flow（Subflow）
+  - 顺序阶段：逐个直接调用
+  - 并行阶段：线程池直接调用，不经过 Task 包装（子 Flow 自身即为 subflow run，
+    无需额外的 Task run 及其状态写入）
 - 按照 YAML 顺序编排工作流
 - 不包含具体业务逻辑（由 Tasks 和 FlowOrchestrator 实现）
 
 架构：
 - Flow: Prefect 编排层（本文件）
-- FlowOrchestrator: 配置解析和执行计划（apps/scan/services/）
+- FlowOrchestrator: 配置解析和执行计划（apps/scan/orchestrators/）
 - Tasks: 执行层（apps/scan/tasks/）
 - Handlers: 状态管理（apps/scan/handlers/）
 """
@@ -20,27 +23,33 @@
 # 注意：动态扫描容器应使用 run_initiate_scan.py 启动，以便在导入前设置环境变量
 from apps.common.prefect_django_setup import setup_django_for_prefect
 
-from prefect import flow, task
+from prefect import flow
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+import contextvars
 import logging
 
+from django.db import transaction
+
 from apps.scan.handlers import (
     on_initiate_scan_flow_running,
     on_initiate_scan_flow_completed,
     on_initiate_scan_flow_failed,
 )
-from prefect.futures import wait
 from apps.scan.utils import setup_scan_workspace
 from apps.scan.orchestrators import FlowOrchestrator
+from apps.scan.models import Scan
+from apps.scan.services import ScanService
+from apps.targets.services import TargetService
 
 logger = logging.getLogger(__name__)
 
+# 日志分隔线
+_BANNER_LINE = "=" * 60
 
-@task(name="run_subflow")
-def _run_subflow_task(scan_type: str, flow_func, flow_kwargs: dict):
-    """包装子 Flow 的 Task，用于在并行阶段并发执行子 Flow。"""
-    logger.info("开始执行子 Flow: %s", scan_type)
-    return flow_func(**flow_kwargs)
+# Service 无状态，模块级复用
+_scan_service = ScanService()
+_target_service = TargetService()
 
 
 @flow(
@@ -100,52 +109,39 @@ def initiate_scan_flow(
         
         
         logger.info(
-            "="*60 + "\n" +
-            "开始初始化扫描任务\n" +
-            f"  Scan ID: {scan_id}\n" +
-            f"  Target: {target_name}\n" +
-            f"  Engine: {engine_name}\n" +
-            f"  Workspace: {scan_workspace_dir}\n" +
-            "="*60
+            "%s\n开始初始化扫描任务\n  Scan ID: %s\n  Target: %s\n  Engine: %s\n  Workspace: %s\n%s",
+            _BANNER_LINE, scan_id, target_name, engine_name, scan_workspace_dir, _BANNER_LINE
         )
         
         # ==================== Task 1: 创建 Scan 工作空间 ====================
         scan_workspace_path = setup_scan_workspace(scan_workspace_dir)
         
         # ==================== Task 2: 获取引擎配置 ====================
-        from apps.scan.models import Scan
-        scan = Scan.objects.select_related('engine').get(id=scan_id)
-        engine_config = scan.engine.configuration
+        # 只需引擎配置一列，不实例化 Scan / ScanEngine 模型
+        engine_config = Scan.objects.filter(id=scan_id).values_list(
+            'engine__configuration', flat=True
+        ).get()
         
         # ==================== Task 3: 解析配置，生成执行计划 ====================
         orchestrator = FlowOrchestrator(engine_config)
         
-        # FlowOrchestrator 已经解析了所有工具配置
-        enabled_tools_by_type = orchestrator.enabled_tools_by_type
-        
         logger.info(
             f"执行计划生成成功：\n"
             f"  扫描类型: {' → '.join(orchestrator.scan_types)}\n"
             f"  总共 {len(orchestrator.scan_types)} 个 Flow"
         )
         
-        # ==================== 初始化阶段进度 ====================
-        # 在解析完配置后立即初始化，此时已有完整的 scan_types 列表
-        from apps.scan.services import ScanService
-        scan_service = ScanService()
-        scan_service.init_stage_progress(scan_id, orchestrator.scan_types)
+        # ==================== 初始化阶段进度 + 更新 Target 最后扫描时间 ====================
+        # 在解析完配置后立即初始化，此时已有完整的 scan_types 列表；
+        # 最后扫描时间表示"最后一次扫描开始时间"。两条 UPDATE 放在同一事务中，只提交一次
+        with transaction.atomic():
+            _scan_service.init_stage_progress(scan_id, orchestrator.scan_types)
+            _target_service.update_last_scanned_at(target_id)
         logger.info(f"✓ 初始化阶段进度 - Stages: {orchestrator.scan_types}")
-        
-        # ==================== 更新 Target 最后扫描时间 ====================
-        # 在开始扫描时更新，表示"最后一次扫描开始时间"
-        from apps.targets.services import TargetService
-        target_service = TargetService()
-        target_service.update_last_scanned_at(target_id)
         logger.info(f"✓ 更新 Target 最后扫描时间 - Target ID: {target_id}")
         
         # ==================== Task 3: 执行 Flow（动态阶段执行）====================
         # 注意：各阶段状态更新由 scan_flow_handlers.py 自动处理（running/completed/failed）
-        executed_flows = []
         results = {}
         
         # 通用执行参数
@@ -169,46 +165,43 @@ def initiate_scan_flow(
                 # 失败处理：记录错误但不抛出异常，让扫描继续执行后续阶段
                 error_msg = f"{scan_type} 执行失败: {str(error)}"
                 logger.warning(error_msg)
-                executed_flows.append(f"{scan_type} (失败)")
                 results[scan_type] = {'success': False, 'error': str(error)}
                 # 不再抛出异常，让扫描继续
             else:
                 # 成功处理
-                executed_flows.append(scan_type)
                 results[scan_type] = result
                 logger.info(f"✓ {scan_type} 执行成功")
 
-        def get_valid_flows(flow_names):
+        def get_valid_flows(stage_entries):
             """
-            获取有效的 Flow 函数列表，并为每个 Flow 准备专属参数
+            为阶段内每个 Flow 准备专属参数
             
             Args:
-                flow_names: 扫描类型名称列表
+                stage_entries: 预解析的阶段条目 [(scan_type, flow_func, enabled_tools), ...]
                 
             Returns:
                 list: [(scan_type, flow_func, flow_specific_kwargs), ...] 有效的函数列表
             """
-            valid_flows = []
-            for scan_type in flow_names:
-                flow_func = orchestrator.get_flow_function(scan_type)
-                if flow_func:
-                    # 为每个 Flow 准备专属的参数（包含对应的 enabled_tools）
-                    flow_specific_kwargs = dict(flow_kwargs)
-                    flow_specific_kwargs['enabled_tools'] = enabled_tools_by_type.get(scan_type, {})
-                    valid_flows.append((scan_type, flow_func, flow_specific_kwargs))
-                else:
-                    logger.warning(f"跳过未实现的 Flow: {scan_type}")
-            return valid_flows
+            return [
+                (scan_type, flow_func, flow_kwargs | {'enabled_tools': tools})
+                for scan_type, flow_func, tools in stage_entries
+            ]
 
         # ---------------------------------------------------------
         # 动态阶段执行（基于 FlowOrchestrator 定义）
         # ---------------------------------------------------------
-        for mode, enabled_flows in orchestrator.get_execution_stages():
+        for mode, stage_entries in orchestrator.get_resolved_stages():
+            # 阶段内所有扫描类型均未实现时直接跳过，不输出阶段横幅、不创建线程池
+            if not stage_entries:
+                logger.info("阶段无可执行 Flow，跳过 (mode=%s)", mode)
+                continue
+            valid_flows = get_valid_flows(stage_entries)
+            enabled_flows = [scan_type for scan_type, _, _ in valid_flows]
             if mode == 'sequential':
                 # 顺序执行
-                logger.info(f"\n{'='*60}\n顺序执行阶段: {', '.join(enabled_flows)}\n{'='*60}")
-                for scan_type, flow_func, flow_specific_kwargs in get_valid_flows(enabled_flows):
-                    logger.info(f"\n{'='*60}\n执行 Flow: {scan_type}\n{'='*60}")
+                logger.info("\n%s\n顺序执行阶段: %s\n%s", _BANNER_LINE, ', '.join(enabled_flows), _BANNER_LINE)
+                for scan_type, flow_func, flow_specific_kwargs in valid_flows:
+                    logger.info("\n%s\n执行 Flow: %s\n%s", _BANNER_LINE, scan_type, _BANNER_LINE)
                     try:
                         result = flow_func(**flow_specific_kwargs)
                         record_flow_result(scan_type, result=result)
@@ -216,38 +209,38 @@ def initiate_scan_flow(
                         record_flow_result(scan_type, error=e)
                     
             elif mode == 'parallel':
-                # 并行执行阶段：通过 Task 包装子 Flow，并使用 Prefect TaskRunner 并发运行
-                logger.info(f"\n{'='*60}\n并行执行阶段: {', '.join(enabled_flows)}\n{'='*60}")
-                futures = []
+                # 并行执行阶段：线程池直接调用子 Flow（无需 Task 包装），谁先完成先记录结果
+                logger.info("\n%s\n并行执行阶段: %s\n%s", _BANNER_LINE, ', '.join(enabled_flows), _BANNER_LINE)
 
-                # 提交所有并行子 Flow 任务
-                for scan_type, flow_func, flow_specific_kwargs in get_valid_flows(enabled_flows):
-                    logger.info(f"\n{'='*60}\n提交并行子 Flow 任务: {scan_type}\n{'='*60}")
-                    future = _run_subflow_task.submit(
-                        scan_type=scan_type,
-                        flow_func=flow_func,
-                        flow_kwargs=flow_specific_kwargs,
-                    )
-                    futures.append((scan_type, future))
+                with ThreadPoolExecutor(max_workers=len(valid_flows)) as executor:
+                    futures = {}
+                    for scan_type, flow_func, flow_specific_kwargs in valid_flows:
+                        logger.info("\n%s\n提交并行子 Flow: %s\n%s", _BANNER_LINE, scan_type, _BANNER_LINE)
+                        # 每个线程复制一份当前上下文，子 Flow 仍挂在本 Flow 下作为 subflow
+                        ctx = contextvars.copy_context()
+                        futures[executor.submit(ctx.run, flow_func, **flow_specific_kwargs)] = scan_type
 
-                # 等待所有并行子 Flow 完成
-                if futures:
-                    wait([f for _, f in futures])
-
-                    # 检查结果（复用统一的结果处理逻辑）
-                    for scan_type, future in futures:
+                    # 先完成的子 Flow 立即记录结果，不等待同阶段最慢的子 Flow
+                    pending = set(futures.values())
+                    for future in as_completed(futures):
+                        scan_type = futures[future]
+                        pending.discard(scan_type)
                         try:
-                            result = future.result()
-                            record_flow_result(scan_type, result=result)
+                            record_flow_result(scan_type, result=future.result())
                         except Exception as e:
                             record_flow_result(scan_type, error=e)
+                        if pending:
+                            logger.info("并行阶段仍在执行: %s", ', '.join(sorted(pending)))
 
         # ==================== 完成 ====================
+        # 已执行的 Flow 列表由 results 一次性生成（失败的标注 "(失败)"）
+        executed_flows = [
+            f"{scan_type} (失败)" if isinstance(res, dict) and not res.get('success', True) else scan_type
+            for scan_type, res in results.items()
+        ]
         logger.info(
-            "="*60 + "\n" +
-            "✓ 扫描任务初始化完成\n" +
-            f"  执行的 Flow: {', '.join(executed_flows)}\n" +
-            "="*60
+            "%s\n✓ 扫描任务初始化完成\n  执行的 Flow: %s\n%s",
+            _BANNER_LINE, ', '.join(executed_flows), _BANNER_LINE
         )
         
         # ==================== 返回结果 ====================
@@ -264,10 +257,6 @@ def initiate_scan_flow(
         # 参数错误
         logger.error("参数错误: %s", e)
         raise
-    except RuntimeError as e:
-        # 执行失败
-        logger.error("运行时错误: %s", e)
-        raise
     except OSError as e:
         # 文件系统错误（工作空间创建失败）
         logger.error("文件系统错误: %s", e)
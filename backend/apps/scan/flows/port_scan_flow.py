@@ -16,6 +16,7 @@ from apps.common.prefect_django_setup import setup_django_for_prefect
 import logging
 import os
 import subprocess
+from datetime import datetime
 from pathlib import Path
 from typing import Callable
 from prefect import flow
@@ -28,15 +29,20 @@ from apps.scan.handlers.scan_flow_handlers import (
     on_scan_flow_completed,
     on_scan_flow_failed,
 )
-from apps.scan.utils import config_parser, build_scan_command
+from apps.scan.utils import config_parser, build_scan_command, count_file_lines
 
 logger = logging.getLogger(__name__)
 
+# 日志分隔线
+_BANNER_LINE = "=" * 60
+
 
 def calculate_port_scan_timeout(
     tool_config: dict,
     file_path: str,
-    base_per_pair: float = 0.5
+    target_count: int | None = None,
+    base_per_pair: float = 0.5,
+    port_count: int | None = None
 ) -> int:
     """
     根据目标数量和端口数量计算超时时间
@@ -47,7 +53,9 @@ def calculate_port_scan_timeout(
     Args:
         tool_config: 工具配置字典，包含端口配置（ports, top-ports等）
         file_path: 目标文件路径（域名/IP列表）
+        target_count: 目标数量（导出时已知则直接传入，不再读取文件）
         base_per_pair: 每个"端口-目标对"的基础时间（秒），默认 0.5秒
+        port_count: 端口数量（已预先解析则直接传入，跳过 _parse_port_count）
     
     Returns:
         int: 计算出的超时时间（秒），范围：60 ~ 172800
@@ -61,17 +69,13 @@ def calculate_port_scan_timeout(
         )
     """
     try:
-        # 1. 统计目标数量
-        result = subprocess.run(
-            ['wc', '-l', file_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        target_count = int(result.stdout.strip().split()[0])
+        # 1. 统计目标数量（未传入时才读取文件）
+        if target_count is None:
+            target_count = count_file_lines(file_path)
         
-        # 2. 解析端口数量
-        port_count = _parse_port_count(tool_config)
+        # 2. 解析端口数量（未传入时才解析）
+        if port_count is None:
+            port_count = _parse_port_count(tool_config)
         
         # 3. 计算超时时间
         # 总工作量 = 目标数 × 端口数
@@ -113,28 +117,29 @@ def _parse_port_count(tool_config: dict) -> int:
     Returns:
         int: 端口数量
     """
-    # 1. 检查 top-ports 配置
-    if 'top-ports' in tool_config:
-        top_ports = tool_config['top-ports']
+    # 1. 检查 top-ports 配置（常见情况：整数，直接返回）
+    #    config_parser 会把中划线转换为下划线，两种写法都支持
+    top_ports = tool_config.get('top_ports', tool_config.get('top-ports'))
+    if top_ports is not None:
         if isinstance(top_ports, int) and top_ports > 0:
             return top_ports
         logger.warning(f"top-ports 配置无效: {top_ports}，使用默认值")
     
     # 2. 检查 ports 配置
-    if 'ports' in tool_config:
-        ports_str = str(tool_config['ports']).strip()
+    ports = tool_config.get('ports')
+    if ports is not None:
+        ports_str = str(ports).strip()
         
-        # 2.1 逗号分隔的端口列表：80,443,8080
+        # 2.1 逗号分隔的端口列表：80,443,8080（跳过空项，如 "80,443," / "80,,443"）
         if ',' in ports_str:
-            port_list = [p.strip() for p in ports_str.split(',') if p.strip()]
-            return len(port_list)
+            return sum(1 for p in ports_str.split(',') if p.strip())
         
-        # 2.2 端口范围：1-1000
+        # 2.2 端口范围：1-1000（int() 自带首尾空白处理）
         if '-' in ports_str:
+            start, _, end = ports_str.partition('-')
             try:
-                start, end = ports_str.split('-', 1)
-                start_port = int(start.strip())
-                end_port = int(end.strip())
+                start_port = int(start)
+                end_port = int(end)
                 
                 if 1 <= start_port <= end_port <= 65535:
                     return end_port - start_port + 1
@@ -143,11 +148,10 @@ def _parse_port_count(tool_config: dict) -> int:
                 logger.warning(f"端口范围解析失败: {ports_str}，使用默认值")
         
         # 2.3 单个端口
-        try:
-            port = int(ports_str)
-            if 1 <= port <= 65535:
+        elif ports_str.isdigit():
+            if 1 <= int(ports_str) <= 65535:
                 return 1
-        except ValueError:
+        else:
             logger.warning(f"端口配置解析失败: {ports_str}，使用默认值")
     
     # 3. 默认值：naabu 默认扫描 top 100 端口
@@ -204,7 +208,8 @@ def _run_scans_sequentially(
     port_scan_dir: Path,
     scan_id: int,
     target_id: int,
-    target_name: str
+    target_name: str,
+    target_count: int | None = None
 ) -> tuple[dict, int, list, list]:
     """
     串行执行端口扫描任务
@@ -216,6 +221,7 @@ def _run_scans_sequentially(
         scan_id: 扫描任务 ID
         target_id: 目标 ID
         target_name: 目标名称（用于错误日志）
+        target_count: 导出的目标数量（用于动态计算超时，避免重复读取目标文件）
         
     Returns:
         tuple: (tool_stats, processed_records, successful_tool_names, failed_tools)
@@ -230,8 +236,14 @@ def _run_scans_sequentially(
     processed_records = 0
     failed_tools = []      # 记录失败的工具（含原因）
     
+    # 端口数量只取决于工具配置，循环前统一解析一次
+    port_counts = {name: _parse_port_count(cfg) for name, cfg in enabled_tools.items()}
+    
+    # 日志文件时间戳只生成一次，工具序号保证同一秒内启动的工具文件名不冲突
+    run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
     # for循环执行工具：按顺序串行运行每个启用的端口扫描工具
-    for tool_name, tool_config in enabled_tools.items():
+    for idx, (tool_name, tool_config) in enumerate(enabled_tools.items(), 1):
         # 1. 构建完整命令（变量替换）
         try:
             command = build_scan_command(
@@ -254,14 +266,14 @@ def _run_scans_sequentially(
             # 动态计算超时时间
             config_timeout = calculate_port_scan_timeout(
                 tool_config=tool_config,
-                file_path=str(domains_file)
+                file_path=str(domains_file),
+                target_count=target_count,
+                port_count=port_counts[tool_name]
             )
             logger.info(f"✓ 工具 {tool_name} 动态计算 timeout: {config_timeout}秒")
         
         # 2.1 生成日志文件路径
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = port_scan_dir / f"{tool_name}_{timestamp}.log"
+        log_file = port_scan_dir / f"{tool_name}_{run_ts}_{idx}.log"
         
         # 3. 执行扫描任务
         logger.info("开始执行 %s 扫描（超时: %d秒）...", tool_name, config_timeout)
@@ -275,7 +287,7 @@ def _run_scans_sequentially(
                 scan_id=scan_id,
                 target_id=target_id,
                 cwd=str(port_scan_dir),
-                shell=True,
+                shell=False,  # 命令不含管道/重定向，直接 exec 工具，省去 /bin/sh
                 batch_size=1000,
                 timeout=config_timeout,
                 log_file=str(log_file)  # 新增：日志文件路径
@@ -305,12 +317,14 @@ def _run_scans_sequentially(
         except Exception as exc:
             # 其他异常
             failed_tools.append({'tool': tool_name, 'reason': str(exc)})
-            logger.error("工具 %s 执行失败: %s", tool_name, exc, exc_info=True)
+            logger.warning("工具 %s 执行失败: %s", tool_name, exc)
+    
+    failed_tool_names = [f['tool'] for f in failed_tools]
     
     if failed_tools:
         logger.warning(
             "以下扫描工具执行失败: %s",
-            ', '.join([f['tool'] for f in failed_tools])
+            ', '.join(failed_tool_names)
         )
     
     if not tool_stats:
@@ -320,14 +334,14 @@ def _run_scans_sequentially(
         return {}, 0, [], failed_tools
     
     # 动态计算成功的工具列表
-    successful_tool_names = [name for name in enabled_tools.keys() 
-                              if name not in [f['tool'] for f in failed_tools]]
+    failed_name_set = frozenset(failed_tool_names)
+    successful_tool_names = [name for name in enabled_tools if name not in failed_name_set]
     
     logger.info(
         "✓ 串行端口扫描执行完成 - 成功: %d/%d (成功: %s, 失败: %s)",
         len(tool_stats), len(enabled_tools),
         ', '.join(successful_tool_names) if successful_tool_names else '无',
-        ', '.join([f['tool'] for f in failed_tools]) if failed_tools else '无'
+        ', '.join(failed_tool_names) if failed_tool_names else '无'
     )
     
     return tool_stats, processed_records, successful_tool_names, failed_tools
@@ -412,12 +426,8 @@ def port_scan_flow(
             raise ValueError("enabled_tools 不能为空")
         
         logger.info(
-            "="*60 + "\n" +
-            "开始端口扫描\n" +
-            f"  Scan ID: {scan_id}\n" +
-            f"  Target: {target_name}\n" +
-            f"  Workspace: {scan_workspace_dir}\n" +
-            "="*60
+            "%s\n开始端口扫描\n  Scan ID: %s\n  Target: %s\n  Workspace: %s\n%s",
+            _BANNER_LINE, scan_id, target_name, scan_workspace_dir, _BANNER_LINE
         )
         
         # Step 0: 创建工作目录
@@ -464,10 +474,11 @@ def port_scan_flow(
             port_scan_dir=port_scan_dir,
             scan_id=scan_id,
             target_id=target_id,
-            target_name=target_name
+            target_name=target_name,
+            target_count=target_count
         )
         
-        logger.info("="*60 + "\n✓ 端口扫描完成\n" + "="*60)
+        logger.info("%s\n✓ 端口扫描完成\n%s", _BANNER_LINE, _BANNER_LINE)
         
         # 动态生成已执行的任务列表
         executed_tasks = ['export_scan_targets', 'parse_config']
@@ -6,7 +6,7 @@
 
 架构：
 - Flow 负责编排多个原子 Task
-- 支持串行执行扫描工具（流式处理）
+- 支持并发执行扫描工具（流式处理）
 - 每个 Task 可独立重试
 - 配置由 YAML 解析
 """
@@ -14,13 +14,21 @@
 # Django 环境初始化（导入即生效）
 from apps.common.prefect_django_setup import setup_django_for_prefect
 
+import contextvars
+import copy
 import logging
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Optional
 from prefect import flow
-from apps.scan.tasks.site_scan import export_site_urls_task, run_and_stream_save_websites_task
+from apps.scan.tasks.site_scan import (
+    export_site_urls_task,
+    run_and_stream_save_websites_task,
+    WebsiteWriteBuffer,
+)
 from apps.scan.handlers.scan_flow_handlers import (
     on_scan_flow_running,
     on_scan_flow_completed,
@@ -30,62 +38,51 @@ from apps.scan.utils import config_parser, build_scan_command
 
 logger = logging.getLogger(__name__)
 
+# 导出的站点 URL 文件名（位于 site_scan 目录下）
+_URLS_FILENAME = 'site_urls.txt'
 
-def calculate_timeout_by_line_count(
-    tool_config: dict,
-    file_path: str, 
-    base_per_time: int = 1,
-    min_timeout: int = 60
-) -> int:
+# 没有可扫描 URL 时的返回结果模板（使用时深拷贝，再填充本次扫描的字段）
+_EMPTY_RESULT_TEMPLATE = {
+    'success': True,
+    'total_urls': 0,
+    'processed_records': 0,
+    'created_websites': 0,
+    'skipped_no_subdomain': 0,
+    'skipped_failed': 0,
+    'executed_tasks': ['export_site_urls'],
+    'tool_stats': {
+        'total': 0,
+        'successful': 0,
+        'failed': 0,
+        'successful_tools': [],
+        'failed_tools': [],
+        'details': {}
+    }
+}
+
+
+def _prepare_tool_commands(enabled_tools: dict, urls_file: str) -> None:
     """
-    根据文件行数计算 timeout
+    预构建各工具命令（填充 build_scan_command 的进程内缓存）
     
-    使用 wc -l 统计文件行数，根据行数和每行基础时间计算 timeout
+    在 URL 导出（数据库密集）期间于后台线程执行，执行工具时命中缓存。
+    构建失败在此忽略，由 _run_single_tool 再次构建时记录为工具失败。
     
     Args:
-        tool_config: 工具配置字典（此函数未使用，但保持接口一致性）
-        file_path: 要统计行数的文件路径
-        base_per_time: 每行的基础时间（秒），默认1秒
-        min_timeout: 最小超时时间（秒），默认60秒
-    
-    Returns:
-        int: 计算出的超时时间（秒），不低于 min_timeout
-    
-    Example:
-        timeout = calculate_timeout_by_line_count(
-            tool_config={},
-            file_path='/path/to/urls.txt', 
-            base_per_time=2
-        )
+        enabled_tools: 已启用的工具配置字典
+        urls_file: URL 文件路径（导出前即可确定）
     """
-    try:
-        # 使用 wc -l 快速统计行数
-        result = subprocess.run(
-            ['wc', '-l', file_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        # wc -l 输出格式：行数 + 空格 + 文件名
-        line_count = int(result.stdout.strip().split()[0])
-        
-        # 计算 timeout：行数 × 每行基础时间，不低于最小值
-        timeout = max(line_count * base_per_time, min_timeout)
-        
-        logger.info(
-            f"timeout 自动计算: 文件={file_path}, "
-            f"行数={line_count}, 每行时间={base_per_time}秒, 最小值={min_timeout}秒, timeout={timeout}秒"
-        )
-        
-        return timeout
-        
-    except Exception as e:
-        # 如果 wc -l 失败，使用默认值
-        logger.warning(f"wc -l 计算行数失败: {e}，使用默认 timeout: {min_timeout}秒")
-        return min_timeout
-
-
-
+    for tool_name, tool_config in enabled_tools.items():
+        try:
+            build_scan_command(
+                tool_name=tool_name,
+                scan_type='site_scan',
+                command_params={'url_file': urls_file},
+                tool_config=tool_config
+            )
+        except ValueError:
+            # 配置错误留给 _run_single_tool 记录为工具失败，这里只留调试日志
+            logger.debug("预构建 %s 命令失败", tool_name, exc_info=True)
 
 
 def _export_site_urls(target_id: int, site_scan_dir: Path, target_name: str = None) -> tuple[str, int, int]:
@@ -95,25 +92,26 @@ def _export_site_urls(target_id: int, site_scan_dir: Path, target_name: str = No
     Args:
         target_id: 目标 ID
         site_scan_dir: 站点扫描目录
-        target_name: 目标名称（用于懒加载时写入默认值）
+        target_name: 目标名称（保留参数；懒加载默认 URL 由 Task 按 target_id 生成）
         
     Returns:
         tuple: (urls_file, total_urls, association_count)
+            total_urls 为导出时写入文件的行数，可直接用于计算超时
         
     Raises:
         ValueError: URL 数量为 0
     """
     logger.info("Step 1: 导出站点URL列表")
     
-    urls_file = str(site_scan_dir / 'site_urls.txt')
+    urls_file = str(site_scan_dir / _URLS_FILENAME)
     export_result = export_site_urls_task(
         target_id=target_id,
         output_file=urls_file,
-        target_name=target_name,
         batch_size=1000  # 每次处理1000个子域名
     )
     
-    total_urls = export_result['total_urls']
+    # 导出时的行数即 URL 文件的权威行数，后续不再统计文件
+    total_urls = export_result['line_count']
     association_count = export_result['association_count']  # 主机端口关联数
     
     logger.info(
@@ -131,7 +129,126 @@ def _export_site_urls(target_id: int, site_scan_dir: Path, target_name: str = No
     return export_result['output_file'], total_urls, association_count
 
 
-def _run_scans_sequentially(
+def _run_single_tool(
+    tool_name: str,
+    tool_config: dict,
+    urls_file: str,
+    total_urls: int,
+    site_scan_dir: Path,
+    scan_id: int,
+    target_id: int,
+    dynamic_timeout: int,
+    timestamp: str,
+    write_buffer: Optional[WebsiteWriteBuffer] = None
+) -> dict:
+    """
+    执行单个站点扫描工具
+    
+    Args:
+        tool_name: 工具名称
+        tool_config: 工具配置
+        urls_file: URL 文件路径
+        total_urls: URL 总数
+        site_scan_dir: 站点扫描目录
+        scan_id: 扫描任务 ID
+        target_id: 目标 ID
+        dynamic_timeout: 按 URL 数量计算的超时时间（所有工具共用）
+        timestamp: 本次 Flow 运行的时间戳（用于日志文件名）
+        write_buffer: 多工具共享的写入缓冲区（可选）
+        
+    Returns:
+        dict: 成功时 {'tool', 'stats'}，失败时 {'tool', 'reason'}
+    """
+    # 1. 构建完整命令（变量替换）
+    try:
+        command = build_scan_command(
+            tool_name=tool_name,
+            scan_type='site_scan',
+            command_params={'url_file': urls_file},
+            tool_config=tool_config
+        )
+    except Exception as e:
+        logger.error(f"构建 {tool_name} 命令失败: {e}")
+        return {'tool': tool_name, 'reason': f"命令构建失败: {str(e)}"}
+    
+    # 2. 获取超时时间（支持 'auto' 动态计算）
+    config_timeout = tool_config.get('timeout', 300)
+    if config_timeout == 'auto':
+        # 动态计算超时时间
+        timeout = dynamic_timeout
+    else:
+        # 使用配置的超时时间和动态计算的较大值
+        timeout = max(dynamic_timeout, config_timeout)
+    
+    # 2.1 生成日志文件路径（类似端口扫描）
+    log_file = site_scan_dir / f"{tool_name}_{timestamp}.log"
+    
+    # 开始信息并入结束时的单条汇总记录（INFO），这里仅保留 DEBUG
+    logger.debug(
+        "开始执行 %s 站点扫描 - URL数: %d, 最终超时: %ds",
+        tool_name, total_urls, timeout
+    )
+    
+    # 3. 执行扫描任务
+    try:
+        # 流式执行扫描并实时保存结果
+        result = run_and_stream_save_websites_task(
+            cmd=command,
+            tool_name=tool_name,  # 新增：工具名称
+            scan_id=scan_id,
+            target_id=target_id,
+            cwd=os.fspath(site_scan_dir),
+            # httpx 模板不含管道/重定向，直接 exec，省去 /bin/sh 中转（执行器按 shell 规则拆分引号）
+            shell=False,
+            batch_size=1000,
+            timeout=timeout,
+            log_file=os.fspath(log_file),  # 新增：日志文件路径
+            write_buffer=write_buffer
+        )
+    except subprocess.TimeoutExpired:
+        # 超时异常单独处理
+        logger.warning(
+            "⚠️ 工具 %s 执行超时 - 超时配置: %d秒\n"
+            "注意：超时前已解析的站点数据已保存到数据库，但扫描未完全完成。",
+            tool_name, timeout
+        )
+        return {'tool': tool_name, 'reason': f"执行超时（配置: {timeout}秒）"}
+    except Exception as exc:
+        # 其他异常
+        logger.error("工具 %s 执行失败: %s", tool_name, exc, exc_info=True)
+        return {'tool': tool_name, 'reason': str(exc)}
+    
+    processed = result.get('processed_records', 0)
+    created = result.get('created_websites', 0)
+    skipped_no_subdomain = result.get('skipped_no_subdomain', 0)
+    skipped_failed = result.get('skipped_failed', 0)
+    # 每个工具只输出一条汇总记录；结构化字段放在 extra 中，供 JSON 格式化器直接序列化
+    logger.info(
+        "✓ 工具 %s 流式处理完成 - URL数: %d, 超时: %ds%s, 处理记录: %d, 创建站点: %d, 跳过: %d",
+        tool_name, total_urls, timeout, '（自动）' if config_timeout == 'auto' else '',
+        processed, created, skipped_no_subdomain + skipped_failed,
+        extra={
+            'site_scan_tool': {
+                'tool': tool_name,
+                'urls': total_urls,
+                'timeout': timeout,
+                'processed': processed,
+                'created': created,
+                'skipped': skipped_no_subdomain + skipped_failed,
+            }
+        }
+    )
+    return {
+        'tool': tool_name,
+        'stats': {
+            'command': command,
+            'result': result,
+            'timeout': timeout
+        }
+    }
+
+
+def _run_scans_concurrently(
     enabled_tools: dict,
     urls_file: str,
     total_urls: int,
@@ -141,7 +258,10 @@ def _run_scans_sequentially(
     target_name: str
 ) -> tuple[dict, int, list, list]:
     """
-    串行执行站点扫描任务
+    并发执行站点扫描任务
+    
+    各工具是读取同一 URL 文件的独立外部进程（网络 I/O 密集），
+    使用线程池同时运行，总耗时约等于最慢的工具。
     
     Args:
         enabled_tools: 已启用的工具配置字典
@@ -154,100 +274,55 @@ def _run_scans_sequentially(
         
     Returns:
         tuple: (tool_stats, processed_records, successful_tool_names, failed_tools)
-        
-    Raises:
-        RuntimeError: 所有工具均失败
     """
     tool_stats = {}
     processed_records = 0
     failed_tools = []
     
-    for tool_name, tool_config in enabled_tools.items():
-        # 1. 构建完整命令（变量替换）
-        try:
-            command = build_scan_command(
-                tool_name=tool_name,
-                scan_type='site_scan',
-                command_params={
-                    'url_file': urls_file
-                },
-                tool_config=tool_config
+    # URL 文件刚按 total_urls 条写出，直接按数量计算动态超时（每个 URL 1 秒，最少 60 秒），
+    # 无需再统计文件行数；所有工具共用
+    dynamic_timeout = max(total_urls * 1, 60)
+    logger.info("timeout 自动计算: URL数=%d, 每个URL时间=1秒, 最小值=60秒, timeout=%d秒", total_urls, dynamic_timeout)
+    # 所有工具共用同一个日志时间戳（工具名不同，文件名不会冲突）
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # 多个工具并发时共用一个写入缓冲区，跨工具合并写库，避免交叉的 upsert 冲突
+    write_buffer = None
+    if len(enabled_tools) > 1:
+        from apps.asset.services.snapshot import WebsiteSnapshotsService
+        write_buffer = WebsiteWriteBuffer(WebsiteSnapshotsService())
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(enabled_tools))) as executor:
+        # 每个线程复制一份当前上下文，Task 仍归属于本 Flow run
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run, _run_single_tool,
+                tool_name, tool_config, urls_file, total_urls,
+                site_scan_dir, scan_id, target_id, dynamic_timeout, timestamp, write_buffer
             )
-        except Exception as e:
-            reason = f"命令构建失败: {str(e)}"
-            logger.error(f"构建 {tool_name} 命令失败: {e}")
-            failed_tools.append({'tool': tool_name, 'reason': reason})
-            continue
-        
-        # 2. 获取超时时间（支持 'auto' 动态计算）
-        config_timeout = tool_config.get('timeout', 300)
-        if config_timeout == 'auto':
-            # 动态计算超时时间
-            timeout = calculate_timeout_by_line_count(tool_config, urls_file, base_per_time=1)
-            logger.info(f"✓ 工具 {tool_name} 动态计算 timeout: {timeout}秒")
-        else:
-            # 使用配置的超时时间和动态计算的较大值
-            dynamic_timeout = calculate_timeout_by_line_count(tool_config, urls_file, base_per_time=1)
-            timeout = max(dynamic_timeout, config_timeout)
-        
-        # 2.1 生成日志文件路径（类似端口扫描）
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = site_scan_dir / f"{tool_name}_{timestamp}.log"
-        
-        logger.info(
-            "开始执行 %s 站点扫描 - URL数: %d, 最终超时: %ds",
-            tool_name, total_urls, timeout
-        )
-        
-        # 3. 执行扫描任务
+            for tool_name, tool_config in enabled_tools.items()
+        ]
+        # 按配置顺序汇总，保证 tool_stats 顺序稳定
+        for future in futures:
+            outcome = future.result()
+            if 'stats' in outcome:
+                tool_stats[outcome['tool']] = outcome['stats']
+                processed_records += outcome['stats']['result'].get('processed_records', 0)
+            else:
+                failed_tools.append({'tool': outcome['tool'], 'reason': outcome['reason']})
+    
+    # 所有工具结束后写入缓冲区剩余数据
+    if write_buffer is not None:
         try:
-            # 流式执行扫描并实时保存结果
-            result = run_and_stream_save_websites_task(
-                cmd=command,
-                tool_name=tool_name,  # 新增：工具名称
-                scan_id=scan_id,
-                target_id=target_id,
-                cwd=str(site_scan_dir),
-                shell=True,
-                batch_size=1000,
-                timeout=timeout,
-                log_file=str(log_file)  # 新增：日志文件路径
-            )
-            
-            tool_stats[tool_name] = {
-                'command': command,
-                'result': result,
-                'timeout': timeout
-            }
-            processed_records += result.get('processed_records', 0)
-            
-            logger.info(
-                "✓ 工具 %s 流式处理完成 - 处理记录: %d, 创建站点: %d, 跳过: %d",
-                tool_name,
-                result.get('processed_records', 0),
-                result.get('created_websites', 0),
-                result.get('skipped_no_subdomain', 0) + result.get('skipped_failed', 0)
-            )
-            
-        except subprocess.TimeoutExpired as exc:
-            # 超时异常单独处理
-            reason = f"执行超时（配置: {timeout}秒）"
-            failed_tools.append({'tool': tool_name, 'reason': reason})
-            logger.warning(
-                "⚠️ 工具 %s 执行超时 - 超时配置: %d秒\n"
-                "注意：超时前已解析的站点数据已保存到数据库，但扫描未完全完成。",
-                tool_name, timeout
-            )
-        except Exception as exc:
-            # 其他异常
-            failed_tools.append({'tool': tool_name, 'reason': str(exc)})
-            logger.error("工具 %s 执行失败: %s", tool_name, exc, exc_info=True)
+            write_buffer.flush()
+        except Exception as e:
+            logger.error("站点扫描结果写入失败 - 目标: %s, 错误: %s", target_name, e)
+    
+    failed_tool_names = [f['tool'] for f in failed_tools]
     
     if failed_tools:
         logger.warning(
             "以下扫描工具执行失败: %s",
-            ', '.join([f['tool'] for f in failed_tools])
+            ', '.join(failed_tool_names)
         )
     
     if not tool_stats:
@@ -257,15 +332,17 @@ def _run_scans_sequentially(
         return {}, 0, [], failed_tools
     
     # 动态计算成功的工具列表
-    successful_tool_names = [name for name in enabled_tools.keys() 
-                              if name not in [f['tool'] for f in failed_tools]]
+    failed_name_set = frozenset(failed_tool_names)
+    successful_tool_names = [name for name in enabled_tools if name not in failed_name_set]
     
-    logger.info(
-        "✓ 串行站点扫描执行完成 - 成功: %d/%d (成功: %s, 失败: %s)",
-        len(tool_stats), len(enabled_tools),
-        ', '.join(successful_tool_names) if successful_tool_names else '无',
-        ', '.join([f['tool'] for f in failed_tools]) if failed_tools else '无'
-    )
+    # 工具名拼接仅在 INFO 启用时进行
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "✓ 并发站点扫描执行完成 - 成功: %d/%d (成功: %s, 失败: %s)",
+            len(tool_stats), len(enabled_tools),
+            ', '.join(successful_tool_names) if successful_tool_names else '无',
+            ', '.join(failed_tool_names) if failed_tool_names else '无'
+        )
     
     return tool_stats, processed_records, successful_tool_names, failed_tools
 
@@ -302,7 +379,8 @@ def calculate_timeout(url_count: int, base: int = 600, per_url: int = 1) -> int:
 
 @flow(
     name="site_scan", 
-    log_prints=True,
+    # 本 Flow 只用 logger 输出，工具输出已写入 log_file；关闭 print 捕获
+    log_prints=False,
     on_running=[on_scan_flow_running],
     on_completion=[on_scan_flow_completed],
     on_failure=[on_scan_flow_failed],
@@ -325,7 +403,7 @@ def site_scan_flow(
         Step 0: 创建工作目录
         Step 1: 导出站点 URL 列表
         Step 2: 解析配置，获取启用的工具
-        Step 3: 串行执行扫描工具并实时保存结果
+        Step 3: 并发执行扫描工具并实时保存结果
     
     Args:
         scan_id: 扫描任务 ID
@@ -385,46 +463,35 @@ def site_scan_flow(
         from apps.scan.utils import setup_scan_directory
         site_scan_dir = setup_scan_directory(scan_workspace_dir, 'site_scan')
         
-        # Step 1: 导出站点 URL
-        urls_file, total_urls, association_count = _export_site_urls(
-            target_id, site_scan_dir, target_name
-        )
+        # Step 1: 导出站点 URL；URL 文件路径是确定的，导出期间在后台线程预构建工具命令
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(
+                _prepare_tool_commands, enabled_tools, str(site_scan_dir / _URLS_FILENAME)
+            )
+            urls_file, total_urls, association_count = _export_site_urls(
+                target_id, site_scan_dir, target_name
+            )
         
         if total_urls == 0:
             logger.warning("目标下没有可用的站点URL，跳过站点扫描")
-            return {
-                'success': True,
-                'scan_id': scan_id,
-                'target': target_name,
-                'scan_workspace_dir': scan_workspace_dir,
-                'urls_file': urls_file,
-                'total_urls': 0,
-                'association_count': association_count,
-                'processed_records': 0,
-                'created_websites': 0,
-                'skipped_no_subdomain': 0,
-                'skipped_failed': 0,
-                'executed_tasks': ['export_site_urls'],
-                'tool_stats': {
-                    'total': 0,
-                    'successful': 0,
-                    'failed': 0,
-                    'successful_tools': [],
-                    'failed_tools': [],
-                    'details': {}
-                }
-            }
+            empty_result = copy.deepcopy(_EMPTY_RESULT_TEMPLATE)
+            empty_result.update(
+                scan_id=scan_id,
+                target=target_name,
+                scan_workspace_dir=scan_workspace_dir,
+                urls_file=urls_file,
+                association_count=association_count
+            )
+            return empty_result
         
         # Step 2: 工具配置信息
-        logger.info("Step 2: 工具配置信息")
-        logger.info(
-            "✓ 启用工具: %s",
-            ', '.join(enabled_tools.keys())
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Step 2: 工具配置信息")
+            logger.info("✓ 启用工具: %s", ', '.join(enabled_tools))
         
-        # Step 3: 串行执行扫描工具
-        logger.info("Step 3: 串行执行扫描工具并实时保存结果")
-        tool_stats, processed_records, successful_tool_names, failed_tools = _run_scans_sequentially(
+        # Step 3: 并发执行扫描工具
+        logger.info("Step 3: 并发执行扫描工具并实时保存结果")
+        tool_stats, processed_records, successful_tool_names, failed_tools = _run_scans_concurrently(
             enabled_tools=enabled_tools,
             urls_file=urls_file,
             total_urls=total_urls,
@@ -440,10 +507,13 @@ def site_scan_flow(
         executed_tasks = ['export_site_urls', 'parse_config']
         executed_tasks.extend([f'run_and_stream_save_websites ({tool})' for tool in tool_stats.keys()])
         
-        # 汇总所有工具的结果
-        total_created = sum(stats['result'].get('created_websites', 0) for stats in tool_stats.values())
-        total_skipped_no_subdomain = sum(stats['result'].get('skipped_no_subdomain', 0) for stats in tool_stats.values())
-        total_skipped_failed = sum(stats['result'].get('skipped_failed', 0) for stats in tool_stats.values())
+        # 汇总所有工具的结果（单次遍历）
+        total_created = total_skipped_no_subdomain = total_skipped_failed = 0
+        for stats in tool_stats.values():
+            tool_result = stats['result']
+            total_created += tool_result.get('created_websites', 0)
+            total_skipped_no_subdomain += tool_result.get('skipped_no_subdomain', 0)
+            total_skipped_failed += tool_result.get('skipped_failed', 0)
         
         return {
             'success': True,
@@ -22,32 +22,42 @@
 from apps.common.prefect_django_setup import setup_django_for_prefect
 
 from prefect import flow
+from prefect.futures import as_completed
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
+from functools import lru_cache
 from apps.scan.handlers.scan_flow_handlers import (
     on_scan_flow_running,
     on_scan_flow_completed,
     on_scan_flow_failed,
 )
-from apps.scan.utils import build_scan_command, ensure_wordlist_local
+from apps.scan.tasks.subdomain_discovery import (
+    run_subdomain_discovery_task,
+    merge_and_validate_task,
+    save_domains_task,
+)
+from apps.scan.utils import build_scan_command, count_file_lines, ensure_wordlist_local
 from apps.engine.services.wordlist_service import WordlistService
 from apps.common.normalizer import normalize_domain
 from apps.common.validators import validate_domain
 from datetime import datetime
-import uuid
 import subprocess
 
 logger = logging.getLogger(__name__)
 
+# 内存合并写文件时每次 join 的行数
+_WRITE_CHUNK_LINES = 65536
 
 
-
-
+@lru_cache(maxsize=4096)
 def _validate_and_normalize_target(target_name: str) -> str:
     """
     验证并规范化目标域名
     
+    纯函数，按 target_name 缓存（无效域名抛出的异常不会被缓存）
+    
     Args:
         target_name: 原始目标域名
         
@@ -93,20 +103,19 @@ def _run_scans_parallel(
     Raises:
         RuntimeError: 所有工具均失败
     """
-    # 导入任务函数
-    from apps.scan.tasks.subdomain_discovery import run_subdomain_discovery_task
-    
-    # 生成时间戳（所有工具共用）
+    # 生成时间戳和输出目录字符串（所有工具共用，循环内只做 f-string 拼接）
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    result_dir_str = os.fspath(result_dir)
 
     failures = []  # 记录命令构建失败的工具
-    futures = {}
+    # 成功构建命令的工具参数（按位置对齐，供 .map 一次性批量提交）
+    tool_names, commands, timeouts, output_files = [], [], [], []
     
-    # 1. 构建命令并提交并行任务
+    # 1. 构建命令
     for tool_name, tool_config in enabled_tools.items():
         # 1.1 生成唯一的输出文件路径（绝对路径）
-        short_uuid = uuid.uuid4().hex[:4]
-        output_file = str(result_dir / f"{tool_name}_{timestamp}_{short_uuid}.txt")
+        short_uuid = os.urandom(2).hex()
+        output_file = f"{result_dir_str}/{tool_name}_{timestamp}_{short_uuid}.txt"
         
         # 1.2 构建完整命令（变量替换）
         try:
@@ -132,21 +141,16 @@ def _run_scans_parallel(
             timeout = 600
             logger.info(f"✓ 工具 {tool_name} 使用默认 timeout: {timeout}秒")
         
-        # 1.4 提交任务
         logger.debug(
-            f"提交任务 - 工具: {tool_name}, 超时: {timeout}s, 输出: {output_file}"
-        )
-        
-        future = run_subdomain_discovery_task.submit(
-            tool=tool_name,
-            command=command,
-            timeout=timeout,
-            output_file=output_file
+            f"准备任务 - 工具: {tool_name}, 超时: {timeout}s, 输出: {output_file}"
         )
-        futures[tool_name] = future
+        tool_names.append(tool_name)
+        commands.append(command)
+        timeouts.append(timeout)
+        output_files.append(output_file)
     
-    # 2. 检查是否有任何工具成功提交
-    if not futures:
+    # 2. 检查是否有任何工具可以提交
+    if not tool_names:
         logger.warning(
             "所有扫描工具均无法启动 - 目标: %s, 失败详情: %s",
             domain_name, "; ".join(failures)
@@ -154,11 +158,20 @@ def _run_scans_parallel(
         # 返回空结果，不抛出异常，让扫描继续
         return [], [{'tool': 'all', 'reason': '所有工具均无法启动'}], []
     
-    # 3. 等待并行任务完成，获取结果
+    # 3. 批量提交并行任务（.map 一次提交全部工具），按完成顺序获取结果
+    futures = run_subdomain_discovery_task.map(
+        tool=tool_names,
+        command=commands,
+        timeout=timeouts,
+        output_file=output_files
+    )
+    
     result_files = []
     failed_tools = []
     
-    for tool_name, future in futures.items():
+    future_to_tool = dict(zip(futures, tool_names))
+    for future in as_completed(list(future_to_tool)):
+        tool_name = future_to_tool[future]
         try:
             result = future.result()  # 返回文件路径（字符串）或 ""（失败）
             if result:
@@ -185,14 +198,16 @@ def _run_scans_parallel(
         return [], failed_tools, []
     
     # 5. 动态计算成功的工具列表
-    successful_tool_names = [name for name in futures.keys() 
-                              if name not in [f['tool'] for f in failed_tools]]
+    # 失败工具名只构建一次（集合成员判断 O(1)），成功列表保持配置顺序
+    failed_tool_names = [f['tool'] for f in failed_tools]
+    failed_name_set = frozenset(failed_tool_names)
+    successful_tool_names = [name for name in tool_names if name not in failed_name_set]
     
     logger.info(
         "✓ 扫描工具并行执行完成 - 成功: %d/%d (成功: %s, 失败: %s)",
-        len(result_files), len(futures),
+        len(result_files), len(tool_names),
         ', '.join(successful_tool_names) if successful_tool_names else '无',
-        ', '.join([f['tool'] for f in failed_tools]) if failed_tools else '无'
+        ', '.join(failed_tool_names) if failed_tool_names else '无'
     )
     
     return result_files, failed_tools, successful_tool_names
@@ -203,7 +218,8 @@ def _run_single_tool(
     tool_config: dict,
     command_params: dict,
     result_dir: Path,
-    scan_type: str = 'subdomain_discovery'
+    scan_type: str = 'subdomain_discovery',
+    timestamp: str | None = None
 ) -> str:
     """
     运行单个扫描工具
@@ -214,14 +230,14 @@ def _run_single_tool(
         command_params: 命令参数
         result_dir: 结果目录
         scan_type: 扫描类型
+        timestamp: Flow 级时间戳（用于文件名，同一次扫描的文件共用；为空时现取）
         
     Returns:
         str: 输出文件路径，失败返回空字符串
     """
-    from apps.scan.tasks.subdomain_discovery import run_subdomain_discovery_task
-    
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    short_uuid = uuid.uuid4().hex[:4]
+    if timestamp is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    short_uuid = os.urandom(2).hex()
     output_file = str(result_dir / f"{tool_name}_{timestamp}_{short_uuid}.txt")
     
     # 添加 output_file 到参数
@@ -257,9 +273,70 @@ def _run_single_tool(
         return ""
 
 
+def _run_permutation_sample(
+    input_file: str,
+    sample_size: int,
+    sample_output: str,
+    timeout: int
+) -> None:
+    """
+    泛解析采样：dnsgen 变异 → 取前 sample_size 个 → puredns 解析
+    
+    等价于 `cat input | dnsgen - | head -n N | puredns resolve ...`，
+    但直接用 Popen 串联管道：不经过 /bin/sh，stderr 丢弃而不缓存在内存中；
+    head 取够数量退出后 dnsgen 收到 SIGPIPE 立即停止生成。
+    
+    Args:
+        input_file: 当前子域名结果文件
+        sample_size: 采样数量
+        sample_output: puredns 解析结果输出文件
+        timeout: 超时时间（秒）
+    
+    Raises:
+        subprocess.TimeoutExpired: 采样超时（已终止全部进程）
+    """
+    with open(input_file, 'rb') as stdin:
+        dnsgen = subprocess.Popen(
+            ['dnsgen', '-'],
+            stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+    head = subprocess.Popen(
+        ['head', '-n', str(sample_size)],
+        stdin=dnsgen.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    # 关闭父进程持有的管道读端，下游退出时上游才能收到 SIGPIPE
+    dnsgen.stdout.close()
+    puredns = subprocess.Popen(
+        [
+            'puredns', 'resolve',
+            '-r', '/app/backend/resources/resolvers.txt',
+            '--write', sample_output,
+            '--wildcard-tests', '50',
+            '--wildcard-batch', '1000000',
+            '--quiet',
+        ],
+        stdin=head.stdout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    head.stdout.close()
+    
+    processes = (dnsgen, head, puredns)
+    try:
+        puredns.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        for proc in processes:
+            proc.kill()
+        raise
+    finally:
+        # puredns 结束后上游应已退出；仍在运行的（如异常路径）直接终止并回收
+        for proc in processes:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+
 def _count_lines(file_path: str) -> int:
     """
-    统计文件非空行数
+    统计文件非空行数（失败时记录告警并返回 0）
     
     Args:
         file_path: 文件路径
@@ -268,39 +345,145 @@ def _count_lines(file_path: str) -> int:
         int: 非空行数量
     """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            return sum(1 for line in f if line.strip())
+        return count_file_lines(file_path, non_empty=True)
     except Exception as e:
         logger.warning(f"统计文件行数失败: {file_path} - {e}")
         return 0
 
 
-def _merge_files(file_list: list, output_file: str) -> str:
+def _estimate_lines(file_path: str, avg_line_bytes: int) -> int:
+    """
+    按文件大小估算行数（一次 stat，不读取文件内容）
+    
+    仅用于超时估算等不要求精确的场景。avg_line_bytes 取偏小值时估算偏大，
+    超时更宽松。
+    
+    Args:
+        file_path: 文件路径
+        avg_line_bytes: 平均每行字节数（含换行符）
+    
+    Returns:
+        int: 估算行数，文件不存在或为空时返回 0
+    """
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return 0
+    return max(1, size // avg_line_bytes) if size else 0
+
+
+def _merge_files(file_list: list, output_file: str, domain_name: str | None = None) -> tuple[str, int]:
     """
-    合并多个文件并去重
+    合并多个文件并去重（输出按字节序排序）
+    
+    优先使用 LC_ALL=C sort -u 外部排序合并（内存占用恒定），再流式过滤空行写出；
+    sort 不可用或失败时回退到内存去重。
     
     Args:
         file_list: 文件路径列表
         output_file: 输出文件路径
+        domain_name: 目标域名（可选），指定时只保留该域名及其子域名
         
     Returns:
-        str: 输出文件路径
+        tuple: (输出文件路径, 非空行数)；行数由合并过程直接得出，调用方无需再统计文件
+    """
+    valid_files = [f for f in file_list if f and Path(f).exists()]
+    
+    try:
+        count = _merge_files_external(valid_files, output_file, domain_name)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning("sort 合并失败，回退到内存去重: %s", e)
+        count = _merge_files_in_memory(valid_files, output_file, domain_name)
+    
+    logger.info("合并完成: %d 个域名 -> %s", count, output_file)
+    return output_file, count
+
+
+def _in_scope(domain, domain_name, suffix) -> bool:
+    """域名是否为目标域名本身或其子域名（str / bytes 均可，suffix 为 '.' + domain_name）
+
+    工具输出可能带大写（如 WWW.Example.com），比较前先转小写；写出时仍保留原始内容。
+    domain_name / suffix 需为小写（目标名已经过 normalize_domain）。
+    """
+    domain = domain.lower()
+    return domain == domain_name or domain.endswith(suffix)
+
+
+def _merge_files_external(valid_files: list, output_file: str, domain_name: str | None = None) -> int:
+    """
+    使用 sort -u 合并去重，返回写入的域名数量
+    
+    sort 对输入做外部归并排序，Python 侧只逐行流式读取排好序的结果，
+    去掉首尾空白和空行，并与上一行比较去重；指定 domain_name 时过滤掉范围外的域名。
     """
+    if not valid_files:
+        open(output_file, 'w', encoding='utf-8').close()
+        return 0
+    
+    sorted_file = f"{output_file}.sorted"
+    subprocess.run(
+        ['sort', '-u', *valid_files, '-o', sorted_file],
+        check=True,
+        env={**os.environ, 'LC_ALL': 'C'}
+    )
+    
+    count = 0
+    prev = None
+    try:
+        # 按 bytes 逐行处理，不做 UTF-8 解码（与计数、内存合并路径一致）
+        with open(sorted_file, 'rb') as src, open(output_file, 'wb') as dst:
+            name = domain_name.lower().encode() if domain_name else None
+            suffix = b'.' + name if name else None
+            for line in src:
+                domain = line.strip()
+                if suffix and domain and not _in_scope(domain, name, suffix):
+                    continue
+                if domain and domain != prev:
+                    dst.write(domain + b'\n')
+                    prev = domain
+                    count += 1
+    finally:
+        os.unlink(sorted_file)
+    return count
+
+
+def _scan_domains_file(file_path: str) -> set:
+    """读取单个结果文件，返回去重后的非空行集合（bytes）"""
     domains = set()
-    for f in file_list:
-        if f and Path(f).exists():
-            with open(f, 'r', encoding='utf-8', errors='ignore') as fp:
-                for line in fp:
-                    line = line.strip()
-                    if line:
-                        domains.add(line)
+    with open(file_path, 'rb') as fp:
+        for line in fp:
+            line = line.strip()
+            if line:
+                domains.add(line)
+    return domains
+
+
+def _merge_files_in_memory(valid_files: list, output_file: str, domain_name: str | None = None) -> int:
+    """
+    内存去重合并（sort 不可用时的回退方案），返回写入的域名数量
     
-    with open(output_file, 'w', encoding='utf-8') as fp:
-        for domain in sorted(domains):
-            fp.write(domain + '\n')
+    以 bytes 去重：不做 UTF-8 解码，单条约为 str 的一半开销；
+    bytes 排序即字节序，与 LC_ALL=C sort 结果一致。
+    """
+    if not valid_files:
+        domains = set()
+    else:
+        # 各文件独立读取去重（读文件时释放 GIL，可与其他文件的解析重叠），再在 C 层合并
+        with ThreadPoolExecutor(max_workers=min(8, len(valid_files))) as executor:
+            partials = list(executor.map(_scan_domains_file, valid_files))
+        domains = set().union(*partials)
     
-    logger.info(f"合并完成: {len(domains)} 个域名 -> {output_file}")
-    return output_file
+    if domain_name:
+        name = domain_name.lower().encode()
+        suffix = b'.' + name
+        domains = {d for d in domains if _in_scope(d, name, suffix)}
+    
+    # 分块 join 后整块写出，避免逐行拼接 domain + b'\n'
+    sorted_domains = sorted(domains)
+    with open(output_file, 'wb') as fp:
+        for i in range(0, len(sorted_domains), _WRITE_CHUNK_LINES):
+            fp.write(b'\n'.join(sorted_domains[i:i + _WRITE_CHUNK_LINES]) + b'\n')
+    return len(sorted_domains)
 
 
 @flow(
@@ -383,13 +566,6 @@ def subdomain_discovery_flow(
             )
             return _empty_result(scan_id, target_name, scan_workspace_dir)
         
-        # 导入任务函数
-        from apps.scan.tasks.subdomain_discovery import (
-            run_subdomain_discovery_task,
-            merge_and_validate_task,
-            save_domains_task
-        )
-        
         # Step 0: 准备工作
         from apps.scan.utils import setup_scan_directory
         result_dir = setup_scan_directory(scan_workspace_dir, 'subdomain_discovery')
@@ -451,11 +627,13 @@ def subdomain_discovery_flow(
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         current_result = str(result_dir / f"subs_passive_{timestamp}.txt")
         if all_result_files:
-            current_result = _merge_files(all_result_files, current_result)
+            # 被动工具（如 amass）可能返回其他域名，合并时只保留目标域名范围内的结果
+            current_result, current_line_count = _merge_files(all_result_files, current_result, domain_name)
             executed_tasks.append('merge_passive')
         else:
             # 创建空文件
             Path(current_result).touch()
+            current_line_count = 0
             logger.warning("Stage 1 无结果，创建空文件")
         
         # ==================== Stage 2: 字典爆破（可选）====================
@@ -480,11 +658,9 @@ def subdomain_discovery_flow(
                 if timeout_value == 'auto' and wordlist:
                     line_count = getattr(wordlist, 'line_count', None)
                     if line_count is None:
-                        try:
-                            with open(local_wordlist_path, 'rb') as f:
-                                line_count = sum(1 for _ in f)
-                        except OSError:
-                            line_count = 0
+                        # 字典记录未保存行数时按文件大小估算（子域名字典单词较短，按 8 字节/行），
+                        # 避免为计算超时完整读取可能数 GB 的字典
+                        line_count = _estimate_lines(local_wordlist_path, avg_line_bytes=8)
 
                     try:
                         line_count_int = int(line_count)
@@ -511,12 +687,13 @@ def subdomain_discovery_flow(
                         'wordlist': local_wordlist_path,
                         'output_file': brute_output
                     },
-                    result_dir=result_dir
+                    result_dir=result_dir,
+                    timestamp=timestamp
                 )
                 
                 if brute_result:
                     # 合并 Stage 1 + Stage 2
-                    current_result = _merge_files(
+                    current_result, current_line_count = _merge_files(
                         [current_result, brute_result],
                         str(result_dir / f"subs_merged_{timestamp}.txt")
                     )
@@ -539,87 +716,82 @@ def subdomain_discovery_flow(
             
             # === Step 3.1: 泛解析采样检测 ===
             # 生成原文件 100 倍的变异样本，检查解析结果是否超过 50 倍
-            before_count = _count_lines(current_result)
+            before_count = current_line_count
             
-            # 配置参数
-            SAMPLE_MULTIPLIER = 100  # 采样数量 = 原文件 × 100
-            EXPANSION_THRESHOLD = 50  # 膨胀阈值 = 原文件 × 50
-            SAMPLE_TIMEOUT = 7200  # 采样超时 2 小时
+            if before_count == 0:
+                # 候选为空：采样与完整变异都不会产生结果，直接跳过（避免启动 dnsgen/puredns）
+                logger.info("Stage 3 跳过: 候选子域为空")
+                failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': '输入为空'})
+            else:
+                # 配置参数
+                SAMPLE_MULTIPLIER = 100  # 采样数量 = 原文件 × 100
+                EXPANSION_THRESHOLD = 50  # 膨胀阈值 = 原文件 × 50
+                SAMPLE_TIMEOUT = 7200  # 采样超时 2 小时
             
-            sample_size = before_count * SAMPLE_MULTIPLIER
-            max_allowed = before_count * EXPANSION_THRESHOLD
+                sample_size = before_count * SAMPLE_MULTIPLIER
+                max_allowed = before_count * EXPANSION_THRESHOLD
             
-            sample_output = str(result_dir / f"subs_permuted_sample_{timestamp}.txt")
-            sample_cmd = (
-                f"cat {current_result} | dnsgen - | head -n {sample_size} | "
-                f"puredns resolve -r /app/backend/resources/resolvers.txt "
-                f"--write {sample_output} --wildcard-tests 50 --wildcard-batch 1000000 --quiet"
-            )
+                sample_output = str(result_dir / f"subs_permuted_sample_{timestamp}.txt")
             
-            logger.info(
-                f"泛解析采样检测: 原文件 {before_count} 个, "
-                f"采样 {sample_size} 个, 阈值 {max_allowed} 个"
-            )
-            
-            try:
-                subprocess.run(
-                    sample_cmd, 
-                    shell=True, 
-                    timeout=SAMPLE_TIMEOUT, 
-                    check=False,
-                    capture_output=True
-                )
-                sample_result_count = _count_lines(sample_output) if Path(sample_output).exists() else 0
-                
                 logger.info(
-                    f"采样结果: {sample_result_count} 个域名存活 "
-                    f"(原文件: {before_count}, 阈值: {max_allowed})"
+                    f"泛解析采样检测: 原文件 {before_count} 个, "
+                    f"采样 {sample_size} 个, 阈值 {max_allowed} 个"
                 )
+            
+                try:
+                    _run_permutation_sample(current_result, sample_size, sample_output, SAMPLE_TIMEOUT)
+                    sample_result_count = _count_lines(sample_output) if Path(sample_output).exists() else 0
                 
-                if sample_result_count > max_allowed:
-                    # 采样结果超过阈值，说明存在泛解析，跳过完整变异
-                    ratio = sample_result_count / before_count if before_count > 0 else sample_result_count
-                    logger.warning(
-                        f"跳过变异: 采样检测到泛解析 "
-                        f"({sample_result_count} > {max_allowed}, 膨胀率 {ratio:.1f}x)"
+                    logger.info(
+                        f"采样结果: {sample_result_count} 个域名存活 "
+                        f"(原文件: {before_count}, 阈值: {max_allowed})"
                     )
-                    failed_tools.append({
-                        'tool': 'subdomain_permutation_resolve',
-                        'reason': f"采样检测到泛解析 (膨胀率 {ratio:.1f}x)"
-                    })
-                else:
-                    # === Step 3.2: 采样通过，执行完整变异 ===
-                    logger.info("采样检测通过，执行完整变异...")
-                    
-                    permuted_output = str(result_dir / f"subs_permuted_{timestamp}.txt")
+                
+                    if sample_result_count > max_allowed:
+                        # 采样结果超过阈值，说明存在泛解析，跳过完整变异
+                        ratio = sample_result_count / before_count if before_count > 0 else sample_result_count
+                        logger.warning(
+                            f"跳过变异: 采样检测到泛解析 "
+                            f"({sample_result_count} > {max_allowed}, 膨胀率 {ratio:.1f}x)"
+                        )
+                        failed_tools.append({
+                            'tool': 'subdomain_permutation_resolve',
+                            'reason': f"采样检测到泛解析 (膨胀率 {ratio:.1f}x)"
+                        })
+                    else:
+                        # === Step 3.2: 采样通过，执行完整变异 ===
+                        logger.info("采样检测通过，执行完整变异...")
                     
-                    permuted_result = _run_single_tool(
-                        tool_name='subdomain_permutation_resolve',
-                        tool_config=permutation_tool_config,
-                        command_params={
-                            'input_file': current_result,
-                            'output_file': permuted_output,
-                        },
-                        result_dir=result_dir
-                    )
+                        permuted_output = str(result_dir / f"subs_permuted_{timestamp}.txt")
                     
-                    if permuted_result:
-                        # 合并原结果 + 变异验证结果
-                        current_result = _merge_files(
-                            [current_result, permuted_result],
-                            str(result_dir / f"subs_with_permuted_{timestamp}.txt")
+                        permuted_result = _run_single_tool(
+                            tool_name='subdomain_permutation_resolve',
+                            tool_config=permutation_tool_config,
+                            command_params={
+                                'input_file': current_result,
+                                'output_file': permuted_output,
+                            },
+                            result_dir=result_dir,
+                            timestamp=timestamp
                         )
-                        successful_tool_names.append('subdomain_permutation_resolve')
-                        executed_tasks.append('permutation')
-                    else:
-                        failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': '执行失败'})
+                    
+                        if permuted_result:
+                            # 合并原结果 + 变异验证结果
+                            current_result, current_line_count = _merge_files(
+                                [current_result, permuted_result],
+                                str(result_dir / f"subs_with_permuted_{timestamp}.txt")
+                            )
+                            successful_tool_names.append('subdomain_permutation_resolve')
+                            executed_tasks.append('permutation')
+                        else:
+                            failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': '执行失败'})
                         
-            except subprocess.TimeoutExpired:
-                logger.warning(f"采样检测超时 ({SAMPLE_TIMEOUT}秒)，跳过变异")
-                failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': '采样检测超时'})
-            except Exception as e:
-                logger.warning(f"采样检测失败: {e}，跳过变异")
-                failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': f'采样检测失败: {e}'})
+                except subprocess.TimeoutExpired:
+                    logger.warning(f"采样检测超时 ({SAMPLE_TIMEOUT}秒)，跳过变异")
+                    failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': '采样检测超时'})
+                except Exception as e:
+                    logger.warning(f"采样检测失败: {e}，跳过变异")
+                    failed_tools.append({'tool': 'subdomain_permutation_resolve', 'reason': f'采样检测失败: {e}'})
         
         # ==================== Stage 4: DNS 存活验证（可选）====================
         # 无论是否启用 Stage 3，只要 resolve.enabled 为 true 就会执行，对当前所有候选子域做统一 DNS 验证
@@ -629,52 +801,48 @@ def subdomain_discovery_flow(
             logger.info("Stage 4: DNS 存活验证")
             logger.info("=" * 40)
             
-            resolve_tool_config = resolve_config.get('subdomain_resolve', {})
-
-            # 根据当前候选子域数量动态计算 timeout（支持 timeout: auto）
-            timeout_value = resolve_tool_config.get('timeout', 3600)
-            if timeout_value == 'auto':
-                line_count = 0
-                try:
-                    with open(current_result, 'rb') as f:
-                        line_count = sum(1 for _ in f)
-                except OSError:
-                    line_count = 0
+            if current_line_count == 0:
+                # 候选为空，无需启动 puredns
+                logger.info("Stage 4 跳过: 候选子域为空")
+                failed_tools.append({'tool': 'subdomain_resolve', 'reason': '输入为空'})
+            else:
+                resolve_tool_config = resolve_config.get('subdomain_resolve', {})
 
-                try:
-                    line_count_int = int(line_count)
-                except (TypeError, ValueError):
-                    line_count_int = 0
-
-                timeout_value = line_count_int * 3 if line_count_int > 0 else 3600
-                resolve_tool_config = {
-                    **resolve_tool_config,
-                    'timeout': timeout_value,
-                }
-                logger.info(
-                    "subdomain_resolve 使用自动 timeout: %s 秒 (候选子域数=%s, 3秒/域名)",
-                    timeout_value,
-                    line_count_int,
-                )
+                # 根据当前候选子域数量动态计算 timeout（支持 timeout: auto）
+                timeout_value = resolve_tool_config.get('timeout', 3600)
+                if timeout_value == 'auto':
+                    # 候选数量随 current_result 一起维护，无需再读取文件
+                    line_count_int = current_line_count
+                    timeout_value = line_count_int * 3 if line_count_int > 0 else 3600
+                    resolve_tool_config = {
+                        **resolve_tool_config,
+                        'timeout': timeout_value,
+                    }
+                    logger.info(
+                        "subdomain_resolve 使用自动 timeout: %s 秒 (候选子域数=%s, 3秒/域名)",
+                        timeout_value,
+                        line_count_int,
+                    )
 
-            alive_output = str(result_dir / f"subs_alive_{timestamp}.txt")
+                alive_output = str(result_dir / f"subs_alive_{timestamp}.txt")
             
-            alive_result = _run_single_tool(
-                tool_name='subdomain_resolve',
-                tool_config=resolve_tool_config,
-                command_params={
-                    'input_file': current_result,
-                    'output_file': alive_output,
-                },
-                result_dir=result_dir
-            )
+                alive_result = _run_single_tool(
+                    tool_name='subdomain_resolve',
+                    tool_config=resolve_tool_config,
+                    command_params={
+                        'input_file': current_result,
+                        'output_file': alive_output,
+                    },
+                    result_dir=result_dir,
+                    timestamp=timestamp
+                )
             
-            if alive_result:
-                current_result = alive_result
-                successful_tool_names.append('subdomain_resolve')
-                executed_tasks.append('resolve')
-            else:
-                failed_tools.append({'tool': 'subdomain_resolve', 'reason': '执行失败'})
+                if alive_result:
+                    current_result = alive_result
+                    successful_tool_names.append('subdomain_resolve')
+                    executed_tasks.append('resolve')
+                else:
+                    failed_tools.append({'tool': 'subdomain_resolve', 'reason': '执行失败'})
         
         # ==================== Final: 保存到数据库 ====================
         logger.info("=" * 40)
@@ -14,18 +14,21 @@
 # Django 环境初始化
 from apps.common.prefect_django_setup import setup_django_for_prefect
 
+import itertools
 import logging
-import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict
 
 from prefect import flow
+from prefect.futures import as_completed
 
 from apps.common.validators import validate_domain
 from apps.scan.tasks.url_fetch import run_url_fetcher_task
 from apps.scan.utils import build_scan_command
 
+from .utils import resolve_timeout
+
 
 logger = logging.getLogger(__name__)
 
@@ -91,14 +94,17 @@ def domain_name_url_fetch_flow(
             ", ".join(domain_name_tools.keys()) if domain_name_tools else "无",
         )
 
-        futures: dict[str, object] = {}
+        # future -> tool_name 反向映射，按完成顺序收集结果
+        future_to_tool: dict[object, str] = {}
         failed_tools: list[dict] = []
 
+        # 时间戳只计算一次；同一次运行内用递增序号区分输出文件
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        counter = itertools.count()
+
         # 提交所有基于域名的 URL 获取任务
         for tool_name, tool_config in domain_name_tools.items():
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            short_uuid = uuid.uuid4().hex[:4]
-            output_file = str(output_path / f"{tool_name}_{timestamp}_{short_uuid}.txt")
+            output_file = str(output_path / f"{tool_name}_{timestamp}_{next(counter):04x}.txt")
 
             command_params = {
                 "domain_name": target_name,
@@ -118,25 +124,7 @@ def domain_name_url_fetch_flow(
                 continue
 
             # 计算超时时间：domain_name 模式下，没有行数统计，auto 使用固定超时
-            raw_timeout = tool_config.get("timeout", 3600)
-            timeout = 3600
-            if isinstance(raw_timeout, str) and raw_timeout == "auto":
-                timeout = 3600
-                logger.info(
-                    "工具 %s 使用固定自动超时: %d 秒 (domain_name 模式)",
-                    tool_name,
-                    timeout,
-                )
-            else:
-                try:
-                    timeout = int(raw_timeout)
-                except (TypeError, ValueError):
-                    logger.warning(
-                        "工具 %s 的 timeout 配置无效(%s)，将使用默认 3600 秒",
-                        tool_name,
-                        raw_timeout,
-                    )
-                    timeout = 3600
+            timeout = resolve_timeout(tool_config.get("timeout", 3600), 3600, 3600, tool_name=tool_name)
 
             logger.info(
                 "提交任务 - 工具: %s, domain_name: %s, 超时: %d秒",
@@ -151,13 +139,14 @@ def domain_name_url_fetch_flow(
                 timeout=timeout,
                 output_file=output_file,
             )
-            futures[tool_name] = future
+            future_to_tool[future] = tool_name
 
         result_files: list[str] = []
         successful_tools: list[str] = []
 
-        # 收集执行结果
-        for tool_name, future in futures.items():
+        # 收集执行结果：先完成的工具先处理，不被慢工具阻塞
+        for future in as_completed(list(future_to_tool)):
+            tool_name = future_to_tool[future]
             try:
                 result = future.result()
                 if result and result.get("success"):
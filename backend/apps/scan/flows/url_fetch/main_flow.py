@@ -13,8 +13,10 @@ URL Fetch 主 Flow
 # Django 环境初始化
 from apps.common.prefect_django_setup import setup_django_for_prefect
 
+import contextvars
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
@@ -25,10 +27,11 @@ from apps.scan.handlers.scan_flow_handlers import (
     on_scan_flow_completed,
     on_scan_flow_failed,
 )
+from apps.scan.utils import count_file_lines
 
 from .domain_name_url_fetch_flow import domain_name_url_fetch_flow
 from .sites_url_fetch_flow import sites_url_fetch_flow
-from .utils import calculate_timeout_by_line_count
+from .utils import calculate_timeout_by_line_count, resolve_timeout
 
 logger = logging.getLogger(__name__)
 
@@ -84,8 +87,7 @@ def _merge_and_deduplicate_urls(result_files: list, url_fetch_dir: Path) -> tupl
     # 统计唯一 URL 数量
     unique_url_count = 0
     if Path(merged_file).exists():
-        with open(merged_file, 'r') as f:
-            unique_url_count = sum(1 for line in f if line.strip())
+        unique_url_count = count_file_lines(merged_file, non_empty=True)
     
     logger.info(
         "✓ URL 合并去重完成 - 合并文件: %s, 唯一 URL 数: %d",
@@ -103,13 +105,13 @@ def _clean_urls_with_uro(
     """使用 uro 清理合并后的 URL 列表"""
     from apps.scan.tasks.url_fetch import clean_urls_task
     
-    raw_timeout = uro_config.get('timeout', 60)
     whitelist = uro_config.get('whitelist')
     blacklist = uro_config.get('blacklist')
     filters = uro_config.get('filters')
     
     # 计算超时时间
-    if isinstance(raw_timeout, str) and raw_timeout == 'auto':
+    timeout = resolve_timeout(uro_config.get('timeout', 60), 60, tool_name='uro')
+    if timeout is None:
         timeout = calculate_timeout_by_line_count(
             tool_config=uro_config,
             file_path=merged_file,
@@ -117,12 +119,6 @@ def _clean_urls_with_uro(
             min_timeout=60,
         )
         logger.info("uro 自动计算超时时间(按行数，每行 1 秒，最小 60 秒): %d 秒", timeout)
-    else:
-        try:
-            timeout = int(raw_timeout)
-        except (TypeError, ValueError):
-            logger.warning("uro timeout 配置无效(%s)，使用默认 60 秒", raw_timeout)
-            timeout = 60
     
     result = clean_urls_task(
         input_file=merged_file,
@@ -145,22 +141,16 @@ def _validate_and_stream_save_urls(
     httpx_config: dict,
     url_fetch_dir: Path,
     scan_id: int,
-    target_id: int
+    target_id: int,
+    url_count: int
 ) -> int:
-    """使用 httpx 验证 URL 存活并流式保存到数据库"""
+    """使用 httpx 验证 URL 存活并流式保存到数据库（url_count 由合并/清理步骤给出，不再重新统计文件）"""
     from apps.scan.utils import build_scan_command
     from apps.scan.tasks.url_fetch import run_and_stream_save_urls_task
     
     logger.info("开始使用 httpx 验证 URL 存活状态...")
     
-    # 统计待验证的 URL 数量
-    try:
-        with open(merged_file, 'r') as f:
-            url_count = sum(1 for _ in f)
-        logger.info("待验证 URL 数量: %d", url_count)
-    except Exception as e:
-        logger.error("读取 URL 文件失败: %s", e)
-        return 0
+    logger.info("待验证 URL 数量: %d", url_count)
     
     if url_count == 0:
         logger.warning("没有需要验证的 URL")
@@ -182,9 +172,8 @@ def _validate_and_stream_save_urls(
         return _save_urls_to_database(merged_file, scan_id, target_id)
     
     # 计算超时时间
-    raw_timeout = httpx_config.get('timeout', 'auto')
-    timeout = 3600
-    if isinstance(raw_timeout, str) and raw_timeout == 'auto':
+    timeout = resolve_timeout(httpx_config.get('timeout', 'auto'), 3600, tool_name='httpx')
+    if timeout is None:
         # 按 URL 行数计算超时时间：每行 3 秒，最小 60 秒
         timeout = max(60, url_count * 3)
         logger.info(
@@ -193,10 +182,6 @@ def _validate_and_stream_save_urls(
             timeout,
         )
     else:
-        try:
-            timeout = int(raw_timeout)
-        except (TypeError, ValueError):
-            timeout = 3600
         logger.info("使用配置的 httpx 超时时间: %d 秒", timeout)
     
     # 生成日志文件路径
@@ -211,7 +196,8 @@ def _validate_and_stream_save_urls(
             scan_id=scan_id,
             target_id=target_id,
             cwd=str(url_fetch_dir),
-            shell=True,
+            # httpx 命令不含管道/重定向，由执行器按 shell 规则拆分为参数列表直接执行，省去 /bin/sh
+            shell=False,
             batch_size=500,
             timeout=timeout,
             log_file=str(log_file)
@@ -321,33 +307,35 @@ def url_fetch_flow(
         all_failed_tools = []
         all_successful_tools = []
         
+        # 子 Flow 使用的工具集合与输出文件互不相交，可同时执行
+        subflows = []
         # 3a: 基于 domain_name（target_name） 的 URL 被动收集（如 waymore）
         if domain_name_tools:
             logger.info("Step 3a: 执行基于 domain_name 的 URL 被动收集子 Flow")
-            tn_result = domain_name_url_fetch_flow(
-                scan_id=scan_id,
-                target_id=target_id,
-                target_name=target_name,
-                output_dir=str(url_fetch_dir),
-                domain_name_tools=domain_name_tools,
-            )
-            all_result_files.extend(tn_result.get('result_files', []))
-            all_failed_tools.extend(tn_result.get('failed_tools', []))
-            all_successful_tools.extend(tn_result.get('successful_tools', []))
-        
+            subflows.append((domain_name_url_fetch_flow, {'domain_name_tools': domain_name_tools}))
         # 3b: 爬虫（以 sites_file 为输入）
         if sites_file_tools:
             logger.info("Step 3b: 执行爬虫子 Flow")
-            crawl_result = sites_url_fetch_flow(
-                scan_id=scan_id,
-                target_id=target_id,
-                target_name=target_name,
-                output_dir=str(url_fetch_dir),
-                enabled_tools=sites_file_tools
-            )
-            all_result_files.extend(crawl_result.get('result_files', []))
-            all_failed_tools.extend(crawl_result.get('failed_tools', []))
-            all_successful_tools.extend(crawl_result.get('successful_tools', []))
+            subflows.append((sites_url_fetch_flow, {'enabled_tools': sites_file_tools}))
+        
+        subflow_kwargs = {
+            'scan_id': scan_id,
+            'target_id': target_id,
+            'target_name': target_name,
+            'output_dir': str(url_fetch_dir),
+        }
+        with ThreadPoolExecutor(max_workers=len(subflows)) as executor:
+            # 每个线程复制一份当前上下文，子 Flow 仍挂在本 Flow 下作为 subflow
+            futures = [
+                executor.submit(contextvars.copy_context().run, subflow, **subflow_kwargs, **tools_kwargs)
+                for subflow, tools_kwargs in subflows
+            ]
+            # 按完成顺序汇总结果（子 Flow 内部已捕获异常并返回失败结果）
+            for future in as_completed(futures):
+                sub_result = future.result()
+                all_result_files.extend(sub_result.get('result_files', []))
+                all_failed_tools.extend(sub_result.get('failed_tools', []))
+                all_successful_tools.extend(sub_result.get('successful_tools', []))
         
         # 检查是否有成功的工具
         if not all_result_files:
@@ -374,11 +362,12 @@ def url_fetch_flow(
         
         # Step 5: 使用 uro 清理 URL（如果启用）
         url_file_for_validation = merged_file
+        url_count_for_validation = unique_url_count
         uro_removed_count = 0
         
         if uro_config and uro_config.get('enabled', False):
             logger.info("Step 5: 使用 uro 清理 URL")
-            url_file_for_validation, cleaned_count, uro_removed_count = _clean_urls_with_uro(
+            url_file_for_validation, url_count_for_validation, uro_removed_count = _clean_urls_with_uro(
                 merged_file=merged_file,
                 uro_config=uro_config,
                 url_fetch_dir=url_fetch_dir
@@ -394,7 +383,8 @@ def url_fetch_flow(
                 httpx_config=httpx_config,
                 url_fetch_dir=url_fetch_dir,
                 scan_id=scan_id,
-                target_id=target_id
+                target_id=target_id,
+                url_count=url_count_for_validation
             )
         else:
             logger.info("Step 6: 保存到数据库（未启用 httpx 验证）")
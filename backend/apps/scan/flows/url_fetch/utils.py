@@ -8,11 +8,42 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 
-from apps.scan.utils import build_scan_command
+from prefect.futures import as_completed
+
+from apps.scan.utils import build_scan_command, count_file_lines
 
 logger = logging.getLogger(__name__)
 
 
+def resolve_timeout(
+    raw_timeout,
+    default: int,
+    auto_value: int | None = None,
+    tool_name: str = "",
+) -> int | None:
+    """
+    解析工具配置中的 timeout 值
+
+    Args:
+        raw_timeout: 配置中的原始 timeout（'auto'、整数或数字字符串）
+        default: 配置无效时使用的默认超时（秒）
+        auto_value: timeout 为 'auto' 时的返回值；None 表示由调用方按输入规模计算
+        tool_name: 工具名称，仅用于告警日志定位是哪个工具的配置有误
+
+    Returns:
+        int | None: 超时时间（秒）；'auto' 且 auto_value 为 None 时返回 None
+    """
+    if isinstance(raw_timeout, str) and raw_timeout == "auto":
+        return auto_value
+    try:
+        return int(raw_timeout)
+    except (TypeError, ValueError):
+        logger.warning(
+            "%s timeout 配置无效(%r)，将使用默认 %d 秒", tool_name or "工具", raw_timeout, default
+        )
+        return default
+
+
 def calculate_timeout_by_line_count(
     tool_config: dict,
     file_path: str,
@@ -79,8 +110,7 @@ def prepare_tool_execution(
     """
     # 1. 统计输入文件行数
     try:
-        with open(input_file, 'r') as f:
-            input_count = sum(1 for _ in f)
+        input_count = count_file_lines(input_file)
         logger.info("工具 %s - 输入类型: %s, 数量: %d", tool_name, input_type, input_count)
     except Exception as e:
         return {"error": f"读取输入文件失败: {e}"}
@@ -108,10 +138,8 @@ def prepare_tool_execution(
         return {"error": f"命令构建失败: {e}"}
 
     # 4. 计算超时时间（支持 auto 和显式整数）
-    raw_timeout = tool_config.get("timeout", 3600)
-    timeout = 3600
-    
-    if isinstance(raw_timeout, str) and raw_timeout == "auto":
+    timeout = resolve_timeout(tool_config.get("timeout", 3600), 3600, tool_name=tool_name)
+    if timeout is None:
         try:
             # katana / waymore 每个站点需要更长时间
             base_per_time = 360 if tool_name in ("katana", "waymore") else 1
@@ -127,16 +155,6 @@ def prepare_tool_execution(
                 e,
             )
             timeout = 3600
-    else:
-        try:
-            timeout = int(raw_timeout)
-        except (TypeError, ValueError):
-            logger.warning(
-                "工具 %s 的 timeout 配置无效(%s)，将使用默认 3600 秒",
-                tool_name,
-                raw_timeout,
-            )
-            timeout = 3600
 
     # 5. 返回执行参数
     return {
@@ -168,7 +186,8 @@ def run_tools_parallel(
     """
     from apps.scan.tasks.url_fetch import run_url_fetcher_task
 
-    futures: dict[str, object] = {}
+    # future -> tool_name 反向映射，按完成顺序收集结果
+    future_to_tool: dict[object, str] = {}
     failed_tools: list[dict] = []
 
     # 提交所有工具的并行任务
@@ -199,11 +218,12 @@ def run_tools_parallel(
             timeout=exec_params["timeout"],
             output_file=exec_params["output_file"],
         )
-        futures[tool_name] = future
+        future_to_tool[future] = tool_name
 
-    # 收集执行结果
+    # 收集执行结果：先完成的工具先处理，不被慢工具阻塞
     result_files = []
-    for tool_name, future in futures.items():
+    for future in as_completed(list(future_to_tool)):
+        tool_name = future_to_tool[future]
         try:
             result = future.result()
             if result and result['success']:
@@ -13,7 +13,7 @@ Flow 的执行由 initiate_scan_flow (Prefect @flow) 负责
 
 import logging
 import yaml
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 
 from apps.scan.configs.command_templates import get_supported_scan_types, EXECUTION_STAGES
 
@@ -184,6 +184,28 @@ class FlowOrchestrator:
                 logger.debug(f"阶段 {stage['mode']}: {enabled_flows}")
                 yield stage['mode'], enabled_flows
 
+    def get_resolved_stages(self) -> List[Tuple[str, List[Tuple[str, Callable, Dict]]]]:
+        """
+        获取预解析的执行计划：每个阶段的 Flow 函数与对应的工具配置
+        
+        编排器每次扫描构建一次，调用方在该次扫描内调用一次即可。
+        未实现的扫描类型已被过滤（阶段内可能因此为空）。
+        
+        Returns:
+            list: [(mode, [(scan_type, flow_func, enabled_tools), ...]), ...]
+        """
+        stages = []
+        for mode, enabled_flows in self.get_execution_stages():
+            entries = []
+            for scan_type in enabled_flows:
+                flow_func = self.get_flow_function(scan_type)
+                if flow_func:
+                    entries.append((scan_type, flow_func, self.enabled_tools_by_type.get(scan_type, {})))
+                else:
+                    logger.warning(f"跳过未实现的 Flow: {scan_type}")
+            stages.append((mode, entries))
+        return stages
+
     def get_flow_function(self, scan_type: str) -> Optional[Callable]:
         """
         获取指定扫描类型的 Flow 函数（延迟导入）
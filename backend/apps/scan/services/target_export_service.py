@@ -10,7 +10,7 @@
 import ipaddress
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional, Iterator
+from typing import Dict, Any, Optional, Iterator, List
 
 from django.db.models import QuerySet
 
@@ -48,7 +48,8 @@ class TargetExportService:
         output_path: str,
         queryset: QuerySet,
         url_field: str = 'url',
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        collected_urls: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         统一 URL 导出函数
@@ -63,6 +64,7 @@ class TargetExportService:
             queryset: 数据源 queryset（由 Task 层构建，应为 values_list flat=True）
             url_field: URL 字段名（用于黑名单过滤）
             batch_size: 批次大小
+            collected_urls: 可选，传入列表时同时收集写入的 URL（调用方无需再回读文件）
             
         Returns:
             dict: {
@@ -94,6 +96,8 @@ class TargetExportService:
                         if self.blacklist_service and not self.blacklist_service.filter_url(url):
                             continue
                         f.write(f"{url}\n")
+                        if collected_urls is not None:
+                            collected_urls.append(url)
                         total_count += 1
                         
                         if total_count % 10000 == 0:
@@ -104,7 +108,7 @@ class TargetExportService:
         
         # 默认值回退模式
         if total_count == 0:
-            total_count = self._generate_default_urls(target_id, output_file)
+            total_count = self._generate_default_urls(target_id, output_file, collected_urls)
         
         logger.info("✓ URL 导出完成 - 数量: %d, 文件: %s", total_count, output_path)
         
@@ -117,7 +121,8 @@ class TargetExportService:
     def _generate_default_urls(
         self,
         target_id: int,
-        output_path: Path
+        output_path: Path,
+        collected_urls: Optional[List[str]] = None
     ) -> int:
         """
         默认值生成器（内部函数）
@@ -131,6 +136,7 @@ class TargetExportService:
         Args:
             target_id: 目标 ID
             output_path: 输出文件路径
+            collected_urls: 可选，传入列表时同时收集写入的 URL
             
         Returns:
             int: 写入的 URL 总数
@@ -156,16 +162,12 @@ class TargetExportService:
             if target_type == Target.TargetType.DOMAIN:
                 urls = [f"http://{target_name}", f"https://{target_name}"]
                 for url in urls:
-                    if self._should_write_url(url):
-                        f.write(f"{url}\n")
-                        total_urls += 1
+                    total_urls += self._write_url(f, url, collected_urls)
                         
             elif target_type == Target.TargetType.IP:
                 urls = [f"http://{target_name}", f"https://{target_name}"]
                 for url in urls:
-                    if self._should_write_url(url):
-                        f.write(f"{url}\n")
-                        total_urls += 1
+                    total_urls += self._write_url(f, url, collected_urls)
                         
             elif target_type == Target.TargetType.CIDR:
                 try:
@@ -174,9 +176,7 @@ class TargetExportService:
                     for ip in network.hosts():
                         urls = [f"http://{ip}", f"https://{ip}"]
                         for url in urls:
-                            if self._should_write_url(url):
-                                f.write(f"{url}\n")
-                                total_urls += 1
+                            total_urls += self._write_url(f, url, collected_urls)
                         
                         if total_urls % 10000 == 0:
                             logger.info("已生成 %d 个 URL...", total_urls)
@@ -186,18 +186,14 @@ class TargetExportService:
                         ip = str(network.network_address)
                         urls = [f"http://{ip}", f"https://{ip}"]
                         for url in urls:
-                            if self._should_write_url(url):
-                                f.write(f"{url}\n")
-                                total_urls += 1
+                            total_urls += self._write_url(f, url, collected_urls)
                                 
                 except ValueError as e:
                     logger.error("CIDR 解析失败: %s - %s", target_name, e)
                     raise ValueError(f"无效的 CIDR: {target_name}") from e
                     
             elif target_type == Target.TargetType.URL:
-                if self._should_write_url(target_name):
-                    f.write(f"{target_name}\n")
-                    total_urls = 1
+                total_urls += self._write_url(f, target_name, collected_urls)
             else:
                 logger.warning("不支持的 Target 类型: %s", target_type)
         
@@ -209,6 +205,15 @@ class TargetExportService:
         if self.blacklist_service:
             return self.blacklist_service.filter_url(url)
         return True
+    
+    def _write_url(self, f, url: str, collected_urls: Optional[List[str]] = None) -> bool:
+        """通过黑名单过滤后写入 URL（可选同时收集），返回是否写入"""
+        if not self._should_write_url(url):
+            return False
+        f.write(f"{url}\n")
+        if collected_urls is not None:
+            collected_urls.append(url)
+        return True
 
     def export_targets(
         self,
@@ -18,6 +18,7 @@ def export_sites_task(
     target_id: int,
     output_file: str,
     batch_size: int = 1000,
+    collect_sites: bool = False,
 ) -> dict:
     """
     导出目标下的所有站点 URL 到 TXT 文件
@@ -34,12 +35,14 @@ def export_sites_task(
         target_id: 目标 ID
         output_file: 输出文件路径（绝对路径）
         batch_size: 每次读取的批次大小，默认 1000
+        collect_sites: 是否在返回值中附带站点列表（调用方无需再回读文件），默认 False
 
     Returns:
         dict: {
             'success': bool,
             'output_file': str,
-            'total_count': int
+            'total_count': int,
+            'sites': list[str]  # 仅 collect_sites=True 时返回
         }
 
     Raises:
@@ -53,19 +56,24 @@ def export_sites_task(
     blacklist_service = BlacklistService()
     export_service = TargetExportService(blacklist_service=blacklist_service)
     
+    sites = [] if collect_sites else None
     result = export_service.export_urls(
         target_id=target_id,
         output_path=output_file,
         queryset=queryset,
-        batch_size=batch_size
+        batch_size=batch_size,
+        collected_urls=sites
     )
     
     # 保持返回值格式不变（向后兼容）
-    return {
+    export_result = {
         'success': result['success'],
         'output_file': result['output_file'],
         'total_count': result['total_count']
     }
+    if collect_sites:
+        export_result['sites'] = sites
+    return export_result
 
 
 
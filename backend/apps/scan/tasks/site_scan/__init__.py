@@ -4,12 +4,14 @@
 包含站点扫描相关的所有任务：
 - export_site_urls_task: 导出站点URL到文件
 - run_and_stream_save_websites_task: 流式运行httpx扫描并实时保存结果
+- WebsiteWriteBuffer: 多工具共享的站点写入缓冲区
 """
 
 from .export_site_urls_task import export_site_urls_task
-from .run_and_stream_save_websites_task import run_and_stream_save_websites_task
+from .run_and_stream_save_websites_task import run_and_stream_save_websites_task, WebsiteWriteBuffer
 
 __all__ = [
     'export_site_urls_task',
     'run_and_stream_save_websites_task',
+    'WebsiteWriteBuffer',
 ]
@@ -67,6 +67,7 @@ def export_site_urls_task(
             'success': bool,
             'output_file': str,
             'total_urls': int,
+            'line_count': int,  # 写入文件的行数（每行一个 URL，与 total_urls 相等）
             'association_count': int  # 主机端口关联数量
         }
         
@@ -123,5 +124,7 @@ def export_site_urls_task(
         'success': True,
         'output_file': str(output_path),
         'total_urls': total_urls,
+        # 写文件时已逐行计数，调用方无需再统计文件行数
+        'line_count': total_urls,
         'association_count': association_count
     }
@@ -23,9 +23,11 @@
 import logging
 import json
 import subprocess
+import threading
 import time
 from pathlib import Path
 from prefect import task
+from prefect.cache_policies import NO_CACHE
 from typing import Generator, Optional, Dict, Any, TYPE_CHECKING
 from django.db import IntegrityError, OperationalError, DatabaseError
 from dataclasses import dataclass
@@ -62,6 +64,73 @@ class ServiceSet:
         )
 
 
+class WebsiteWriteBuffer:
+    """
+    跨工具共享的站点写入缓冲区（线程安全）
+    
+    多个站点扫描工具并发运行时，各自按批次直接写库会对 WebSite 唯一索引
+    产生交叉的 upsert 冲突。共享缓冲区汇总所有工具的快照，攒满 flush_size
+    后由单个写入者一次性保存，写库次数约减少为原来的 1/工具数。
+    
+    与 WebsiteSnapshotsService 提供相同的 save_and_sync 接口，
+    可直接作为 ServiceSet.snapshot 注入。快照和资产表写入前都会去重，
+    不同工具的重复记录合并到同一批次不会产生冲突。
+    
+    使用方式：
+        buffer = WebsiteWriteBuffer(WebsiteSnapshotsService())
+        # 各工具 Task 共用 buffer
+        buffer.flush()  # 所有工具结束后写入剩余数据
+    """
+    
+    def __init__(self, snapshot_service: "WebsiteSnapshotsService", flush_size: int = 2000):
+        """
+        Args:
+            snapshot_service: 实际写库的快照 Service
+            flush_size: 缓冲多少条快照后写库，默认 2000
+        """
+        self._snapshot_service = snapshot_service
+        self._flush_size = flush_size
+        self._pending: list = []
+        self._pending_lock = threading.Lock()
+        # 同一时刻只有一个线程写库
+        self._write_lock = threading.Lock()
+    
+    def save_and_sync(self, items: list) -> None:
+        """
+        加入缓冲区，达到 flush_size 时写库
+        
+        Args:
+            items: 网站快照 DTO 列表
+        """
+        with self._pending_lock:
+            self._pending.extend(items)
+            if len(self._pending) < self._flush_size:
+                return
+            items, self._pending = self._pending, []
+        self._write(items)
+    
+    def flush(self) -> None:
+        """写入缓冲区中剩余的全部数据"""
+        with self._pending_lock:
+            items, self._pending = self._pending, []
+        self._write(items)
+    
+    def _write(self, items: list) -> None:
+        if not items:
+            return
+        try:
+            with self._write_lock:
+                self._snapshot_service.save_and_sync(items)
+        except IntegrityError:
+            raise
+        except Exception:
+            # 可重试的错误：放回缓冲区，避免丢失其他工具的数据
+            # （调用方重试时会重复加入本批次，写库前的去重会处理重复项）
+            with self._pending_lock:
+                self._pending[:0] = items
+            raise
+
+
 def normalize_url(url: str) -> str:
     """
     标准化 URL，移除默认端口号
@@ -677,7 +746,9 @@ def _cleanup_resources(data_generator) -> None:
 @task(
     name='run_and_stream_save_websites',
     retries=0,
-    log_prints=True
+    log_prints=True,
+    # write_buffer 含线程锁，无法计算输入哈希，且本任务不需要缓存
+    cache_policy=NO_CACHE
 )
 def run_and_stream_save_websites_task(
     cmd: str,
@@ -688,7 +759,8 @@ def run_and_stream_save_websites_task(
     shell: bool = False,
     batch_size: int = 1000,
     timeout: Optional[int] = None,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    write_buffer: Optional[WebsiteWriteBuffer] = None
 ) -> dict:
     """
     执行 httpx 站点扫描命令并流式保存结果到数据库
@@ -707,6 +779,7 @@ def run_and_stream_save_websites_task(
         shell: 是否使用 shell 执行（默认 False）
         batch_size: 批量保存大小（默认1000）
         timeout: 命令执行超时时间（秒），None 表示不设置超时
+        write_buffer: 多工具共享的写入缓冲区（可选），None 时各批次直接写库
     
     Returns:
         dict: {
@@ -739,7 +812,10 @@ def run_and_stream_save_websites_task(
         
         # 2. 初始化资源
         data_generator = _parse_httpx_stream_output(cmd, tool_name, cwd, shell, timeout, log_file)
-        services = ServiceSet.create_default()
+        if write_buffer is not None:
+            services = ServiceSet(snapshot=write_buffer)
+        else:
+            services = ServiceSet.create_default()
         
         # 3. 流式处理记录并分批保存
         stats = _process_records_in_batches(
@@ -6,6 +6,7 @@
 """
 
 import logging
+import os
 import uuid
 import subprocess
 from pathlib import Path
@@ -29,8 +30,9 @@ def merge_and_deduplicate_urls_task(
     合并扫描结果并去重（高性能流式处理）
     
     流程：
-    1. 使用 LC_ALL=C sort -u 直接处理多文件
-    2. 排序去重一步完成
+    1. 使用 LC_ALL=C sort -u 直接处理多文件（sort 自行读取各输入文件，
+       无需先拼接；以参数列表执行，不经过 /bin/sh）
+    2. 排序去重一步完成（多核时并行排序）
     3. 返回去重后的 URL 文件路径
     
     Args:
@@ -65,23 +67,24 @@ def merge_and_deduplicate_urls_task(
     merged_file = result_path / f"merged_{timestamp}_{short_uuid}.txt"
 
     try:
-        # 使用系统命令一步完成: 排序去重
-        cmd = f"LC_ALL=C sort -u {' '.join(valid_files)} -o {merged_file}"
-        logger.debug("执行命令: %s", cmd)
-
-        # 按输入文件总行数动态计算超时时间
+        # 使用系统命令一步完成: 排序去重（GNU sort 多核并行排序，最多 8 线程）
+        cmd = [
+            'sort', '-u', f'--parallel={min(os.cpu_count() or 1, 8)}',
+            *valid_files, '-o', str(merged_file),
+        ]
+        logger.debug("执行命令: LC_ALL=C %s", ' '.join(cmd))
+
+        # 按输入文件总行数动态计算超时时间（一次 wc -l 统计全部文件，最后一行为合计）
         total_lines = 0
-        for file_path in valid_files:
-            try:
-                line_count_proc = subprocess.run(
-                    ["wc", "-l", file_path],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                )
-                total_lines += int(line_count_proc.stdout.strip().split()[0])
-            except (subprocess.CalledProcessError, ValueError, IndexError):
-                continue
+        try:
+            line_count_proc = subprocess.run(
+                ["wc", "-l", *valid_files],
+                capture_output=True,
+                text=True,
+            )
+            total_lines = int(line_count_proc.stdout.strip().splitlines()[-1].split()[0])
+        except (ValueError, IndexError):
+            pass
 
         timeout = 3600
         if total_lines > 0:
@@ -96,11 +99,11 @@ def merge_and_deduplicate_urls_task(
             timeout,
         )
 
-        result = subprocess.run(
+        subprocess.run(
             cmd,
-            shell=True,
             check=True,
-            timeout=timeout
+            timeout=timeout,
+            env={**os.environ, 'LC_ALL': 'C'}
         )
 
         logger.debug("✓ 合并去重完成")
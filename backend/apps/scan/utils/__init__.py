@@ -5,8 +5,9 @@
 """
 
 from .directory_cleanup import remove_directory
-from .command_builder import build_scan_command
+from .command_builder import build_scan_command, build_scan_command_prep
 from .command_executor import execute_and_wait, execute_stream
+from .line_count import count_file_lines
 from .wordlist_helpers import ensure_wordlist_local
 from .nuclei_helpers import ensure_nuclei_templates_local
 from .performance import FlowPerformanceTracker, CommandPerformanceTracker
@@ -21,9 +22,12 @@ __all__ = [
     'setup_scan_directory',  # 创建扫描子目录
     # 命令构建
     'build_scan_command',    # 扫描工具命令构建（基于 f-string）
+    'build_scan_command_prep',  # 预构建命令，仅替换逐次变化的参数
     # 命令执行
     'execute_and_wait',      # 等待式执行（文件输出）
     'execute_stream',        # 流式执行（实时处理）
+    # 行数统计
+    'count_file_lines',      # 文件行数统计（按 stat 缓存）
     # 字典文件
     'ensure_wordlist_local', # 确保本地字典文件（含 hash 校验）
     # Nuclei 模板
@@ -4,20 +4,34 @@
 """
 
 import logging
-from typing import Dict, Any
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# 命令中的连续空白（构建后统一压缩为单个空格）
+_WHITESPACE_RE = re.compile(r'\s+')
+# 含换行/制表符或连续空格的参数值会被空白清理改写，不能缓存后再替换
+_UNSTABLE_VALUE_RE = re.compile(r'[^\S ]| {2}')
+
 
 def build_scan_command(
     tool_name: str,
     scan_type: str,
     command_params: Dict[str, Any],
-    tool_config: Dict[str, Any]
+    tool_config: Dict[str, Any],
+    base_key: str = 'base'
 ) -> str:
     """
     构建扫描工具命令（使用 f-string）
     
+    构建结果在进程内按（工具、扫描类型、参数名、工具配置）缓存：命令参数中的字符串值
+    （如 output_file、url_file 等每次不同的路径）先以占位符构建，命中缓存后再替换，
+    因此同一扫描进程内同一工具配置只做一次模板格式化和可选参数拼接（每次扫描在独立的
+    容器进程中运行，缓存不跨扫描）。这是唯一的命令缓存层，调用方无需再自行缓存。
+    工具配置含不可哈希的值（如列表）时不走缓存。
+    
     Args:
         tool_name: 工具名称（如 'subfinder'）
         scan_type: 扫描类型（如 'subdomain_discovery'）
@@ -31,6 +45,7 @@ def build_scan_command(
             - threads: 线程数
             - timeout: 超时时间（秒）
             - 其他可选参数...
+        base_key: 基础命令模板的键名，默认 'base'（如 ffuf 多站点模式使用 'multi_site_base'）
     
     Returns:
         完整的命令字符串
@@ -44,12 +59,58 @@ def build_scan_command(
         ... )
         'subfinder -d example.com -o /tmp/out.txt -silent -t 10'
     """
+    fixed_params = {}
+    substitutions = {}
+    for key, value in command_params.items():
+        # 非空、首尾无空白且不含会被空白清理改写的字符时，才能安全地缓存后替换
+        if isinstance(value, str) and value and value == value.strip() and not _UNSTABLE_VALUE_RE.search(value):
+            placeholder = f"\x01{key}\x01"
+            fixed_params[key] = placeholder
+            substitutions[placeholder] = value
+        else:
+            fixed_params[key] = value
+    
+    try:
+        params_key = tuple(sorted(fixed_params.items()))
+        config_key = tuple(sorted(tool_config.items()))
+        hash((params_key, config_key))
+    except TypeError:
+        return _build_scan_command(tool_name, scan_type, command_params, tool_config, base_key)
+    
+    command = _build_scan_command_cached(tool_name, scan_type, params_key, config_key, base_key)
+    for placeholder, value in substitutions.items():
+        command = command.replace(placeholder, value)
+    return command
+
+
+@lru_cache(maxsize=512)
+def _build_scan_command_cached(
+    tool_name: str,
+    scan_type: str,
+    params_key: tuple,
+    config_key: tuple,
+    base_key: str
+) -> str:
+    """缓存的命令构建（参数以排序后的 items 元组作为缓存键）"""
+    return _build_scan_command(tool_name, scan_type, dict(params_key), dict(config_key), base_key)
+
+
+def _build_scan_command(
+    tool_name: str,
+    scan_type: str,
+    command_params: Dict[str, Any],
+    tool_config: Dict[str, Any],
+    base_key: str
+) -> str:
+    """构建扫描工具命令（实际的模板格式化与可选参数拼接，见 build_scan_command）"""
     from apps.scan.configs.command_templates import get_command_template, SCAN_TOOLS_BASE_PATH
     
     # 获取命令模板
     template = get_command_template(scan_type, tool_name)
     if not template:
         raise ValueError(f"未找到工具 {tool_name} 的命令模板（扫描类型: {scan_type}）")
+    if base_key not in template:
+        raise ValueError(f"工具 {tool_name} 的命令模板缺少 {base_key}（扫描类型: {scan_type}）")
     
     # 合并所有参数，并将中划线统一转成下划线
     # 规范约定：
@@ -72,7 +133,7 @@ def build_scan_command(
     
     try:
         # 1. 构建基础命令
-        base_command = template['base'].format(**all_params)
+        base_command = template[base_key].format(**all_params)
         
         # 2. 拼接可选参数
         optional_parts = []
@@ -87,8 +148,7 @@ def build_scan_command(
             full_command += ' ' + ' '.join(optional_parts)
         
         # 4. 清理多余空白
-        import re
-        cleaned_command = re.sub(r'\s+', ' ', full_command).strip()
+        cleaned_command = _WHITESPACE_RE.sub(' ', full_command).strip()
         
         return cleaned_command
         
@@ -104,3 +164,50 @@ def build_scan_command(
             f"模板: {template}\n"
             f"提供的参数: {list(all_params.keys())}"
         )
+
+
+def build_scan_command_prep(
+    tool_name: str,
+    scan_type: str,
+    tool_config: Dict[str, Any],
+    param_name: str = 'url',
+    command_params: Optional[Dict[str, Any]] = None
+) -> Callable[[Any], str]:
+    """
+    预构建扫描命令，只保留一个逐次变化的参数
+    
+    同一工具对大量目标（如逐站点目录扫描）构建命令时，模板查找、参数合并、
+    可选参数拼接和空白清理都是相同的。这里先用占位符完整构建一次，
+    返回的函数只做一次字符串替换。
+    
+    Args:
+        tool_name: 工具名称（如 'ffuf'）
+        scan_type: 扫描类型（如 'directory_scan'）
+        tool_config: 工具配置参数
+        param_name: 逐次变化的参数名，默认 'url'
+        command_params: 其它固定的命令占位符参数
+    
+    Returns:
+        接收参数值、返回完整命令字符串的函数
+    
+    Raises:
+        ValueError: 命令构建失败（与 build_scan_command 一致）
+    
+    Example:
+        >>> build = build_scan_command_prep('ffuf', 'directory_scan', {'wordlist': '/w.txt'})
+        >>> build('https://example.com/')
+        "ffuf -u 'https://example.com/FUZZ' -se -ac -sf -json -w '/w.txt'"
+    """
+    # 占位符不含空白，不会被 build_scan_command 的空白清理改写
+    placeholder = f"\x00{param_name}\x00"
+    prepared = build_scan_command(
+        tool_name=tool_name,
+        scan_type=scan_type,
+        command_params={**(command_params or {}), param_name: placeholder},
+        tool_config=tool_config
+    )
+    
+    def build(value: Any) -> str:
+        return prepared.replace(placeholder, str(value))
+    
+    return build
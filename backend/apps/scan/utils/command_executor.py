@@ -14,6 +14,7 @@ import logging
 import os
 from django.conf import settings
 import re
+import shlex
 import signal
 import subprocess
 import threading
@@ -477,8 +478,8 @@ class CommandExecutor:
         else:
             logger.debug("日志输出: 丢弃")
         
-        # 根据是否使用shell来格式化命令
-        command = cmd if shell else cmd.split()
+        # 根据是否使用shell来格式化命令（非 shell 模式按 shell 规则拆分，保留引号内的参数）
+        command = cmd if shell else shlex.split(cmd)
         
         # 日志文件句柄
         log_file_handle = None
@@ -490,6 +491,7 @@ class CommandExecutor:
                 self._write_command_start_header(log_file_path, tool_name, cmd, timeout)
             
             # 以追加模式打开日志文件（开始信息已写入）
+            # 行缓冲：每行写入即落盘，与直接写入该 fd 的 stderr 保持顺序，进程异常退出也不丢日志
             log_file_handle = open(log_file_path, 'a', encoding='utf-8', buffering=1)
             
             stdout_target = subprocess.PIPE
@@ -589,7 +591,6 @@ class CommandExecutor:
                 # 如果开启命令日志且有日志文件，同时写入日志文件
                 if log_file_handle and ENABLE_COMMAND_LOGGING:
                     log_file_handle.write(line + '\n')
-                    log_file_handle.flush()
                 
                 # 直接返回行内容，由调用者负责解析
                 yield line
@@ -0,0 +1,61 @@
+"""
+文件行数统计工具模块
+
+提供各扫描 Flow 共用的行数统计（超时计算、结果数量统计等）
+"""
+
+import os
+import re
+from functools import lru_cache
+
+# 每次读取的块大小（1MB）
+_COUNT_CHUNK_SIZE = 1 << 20
+
+# 以换行结尾的空行（仅含空白字符）
+_BLANK_LINE_RE = re.compile(rb'^[ \t\r\f\v]*\n', re.MULTILINE)
+
+
+def count_file_lines(file_path: str, non_empty: bool = False) -> int:
+    """
+    统计文件行数
+
+    按块读取字节，用 bytes.count 统计换行（C 层 memchr），不逐行解码创建对象；
+    最后一行没有换行符时也计入。结果按 (路径, mtime, 大小) 缓存，
+    同一文件内容不变时只统计一次，文件被修改后缓存自动失效。
+
+    Args:
+        file_path: 文件路径
+        non_empty: True 只统计非空行（与 line.strip() 判断一致），False 统计全部行
+
+    Returns:
+        int: 行数
+
+    Raises:
+        OSError: 文件不存在或无法读取
+    """
+    st = os.stat(file_path)
+    return _count_lines_cached(file_path, st.st_mtime_ns, st.st_size, non_empty)
+
+
+@lru_cache(maxsize=64)
+def _count_lines_cached(file_path: str, mtime_ns: int, size: int, non_empty: bool) -> int:
+    """按块统计行数（mtime_ns / size 仅作为缓存键）"""
+    newlines = 0
+    blank_lines = 0
+    tail = b''
+    with open(file_path, 'rb') as f:
+        for buf in iter(lambda: f.read(_COUNT_CHUNK_SIZE), b''):
+            newlines += buf.count(b'\n')
+            if non_empty:
+                # 只在完整行范围内匹配空行，块末尾的半行留到下一块
+                data = tail + buf
+                cut = data.rfind(b'\n') + 1
+                blank_lines += len(_BLANK_LINE_RE.findall(data, 0, cut))
+                tail = data[cut:]
+            else:
+                tail = buf[-1:]
+
+    if non_empty:
+        # 末尾没有换行的最后一行
+        return newlines - blank_lines + (1 if tail.strip() else 0)
+    return newlines + (1 if tail and tail != b'\n' else 0)
@@ -8,6 +8,7 @@
 import logging
 import os
 import ssl
+from functools import lru_cache
 from pathlib import Path
 from urllib import request as urllib_request
 from urllib import parse as urllib_parse
@@ -20,6 +21,16 @@ from apps.engine.services import WordlistService
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=32)
+def _is_local_hash_match(local_path: str, expected_hash: str, mtime_ns: int, size: int) -> bool:
+    """按 (路径, 期望 hash, mtime, 大小) 缓存 hash 校验结果
+
+    同一进程内字典会被多个工具、多次扫描重复校验，文件未变化时无需再次整文件计算 hash；
+    文件被重新下载或修改后 mtime/size 变化，缓存自动失效。
+    """
+    return is_file_hash_match(local_path, expected_hash)
+
+
 def ensure_wordlist_local(wordlist_name: str) -> str:
     """确保本地存在指定字典文件，并返回本地路径
 
@@ -58,10 +69,15 @@ def ensure_wordlist_local(wordlist_name: str) -> str:
     expected_hash = getattr(wordlist, 'file_hash', '') or ''
 
     # 如果本地文件存在，进行 hash 校验
-    if local_path.exists():
+    try:
+        st = local_path.stat()
+    except FileNotFoundError:
+        st = None
+
+    if st is not None:
         if expected_hash:
-            # 有 hash，进行校验
-            if is_file_hash_match(str(local_path), expected_hash):
+            # 有 hash，进行校验（结果按 mtime/size 缓存）
+            if _is_local_hash_match(str(local_path), expected_hash, st.st_mtime_ns, st.st_size):
                 logger.info("本地字典文件有效（hash 匹配）: %s", local_path)
                 return str(local_path)
             else:
@@ -6,6 +6,7 @@
 
 from pathlib import Path
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +50,11 @@ def setup_scan_directory(scan_workspace_dir: str, subdir: str) -> Path:
         Path: 创建的子目录路径
         
     Raises:
-        RuntimeError: 目录创建失败或不可写
+        RuntimeError: 目录创建失败
+    
+    Note:
+        根工作空间已由 setup_scan_workspace 验证可写，子目录不再做 touch/unlink 探测；
+        权限问题会在首次写入（如导出目标文件）时直接报错。
     """
     scan_dir = Path(scan_workspace_dir) / subdir
     
@@ -58,9 +63,6 @@ def setup_scan_directory(scan_workspace_dir: str, subdir: str) -> Path:
     except OSError as e:
         raise RuntimeError(f"创建扫描目录失败: {scan_dir} - {e}") from e
     
-    # 验证可写
-    _verify_writable(scan_dir)
-    
     logger.info("✓ 扫描目录已创建: %s", scan_dir)
     return scan_dir
 
@@ -75,9 +77,10 @@ def _verify_writable(path: Path) -> None:
     Raises:
         RuntimeError: 目录不可写
     """
-    test_file = path / ".test_write"
+    # 匿名临时文件探测：Linux 上为一次 O_TMPFILE open，无需 touch + unlink，
+    # 也不会因固定文件名在并发扫描间冲突
     try:
-        test_file.touch()
-        test_file.unlink()
+        with tempfile.TemporaryFile(dir=path):
+            pass
     except OSError as e:
         raise RuntimeError(f"目录不可写: {path} - {e}") from e
@@ -26,6 +26,19 @@ export interface UpdateRepoPayload {
   repoUrl?: string
 }
 
+export interface RefreshTaskResponse {
+  taskId: string
+  repoId: number
+  status: "running" | "success" | "failed"
+  result: unknown
+  error: string
+}
+
+/** 同步状态轮询间隔（毫秒） */
+const REFRESH_POLL_INTERVAL = 2000
+/** 同步轮询总时长上限（毫秒），超过后停止等待 */
+const REFRESH_POLL_DEADLINE = 30 * 60 * 1000
+
 export interface TemplateTreeResponse {
   roots: Array<{
     type: "folder" | "file"
@@ -89,12 +102,27 @@ export const nucleiRepoApi = {
     await api.delete(`${BASE_URL}${repoId}/`)
   },
 
-  /** 刷新仓库（Git clone/pull） */
-  refreshRepo: async (repoId: number): Promise<{ message: string; result: unknown }> => {
-    const response = await api.post<{ message: string; result: unknown }>(
+  /** 刷新仓库（Git clone/pull），后台执行，轮询直到结束 */
+  refreshRepo: async (repoId: number): Promise<RefreshTaskResponse> => {
+    const submitted = await api.post<{ message: string; taskId: string }>(
       `${BASE_URL}${repoId}/refresh/`
     )
-    return response.data
+    const { taskId } = submitted.data
+    const deadline = Date.now() + REFRESH_POLL_DEADLINE
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, REFRESH_POLL_INTERVAL))
+      const response = await api.get<RefreshTaskResponse>(
+        `${BASE_URL}${repoId}/refresh-status/`,
+        { params: { task: taskId } }
+      )
+      if (response.data.status === "success") {
+        return response.data
+      }
+      if (response.data.status === "failed") {
+        throw new Error(response.data.error || "Git 同步失败")
+      }
+    }
+    throw new Error("Git 同步超时，请稍后刷新页面查看结果")
   },
 
   /** 获取模板目录树 */
@@ -1,3 +1,4 @@
+import axios from "axios"
 import apiClient from "@/lib/api-client"
 import type { GetWordlistsResponse, Wordlist } from "@/types/wordlist.types"
 
@@ -41,14 +42,26 @@ export async function deleteWordlist(id: number): Promise<void> {
   await apiClient.delete(`/wordlists/${id}/`)
 }
 
-// 获取字典内容
+// 获取字典内容（用于编辑，走 raw 流式接口，不受 JSON 接口 5MB 上限限制）
 export async function getWordlistContent(id: number): Promise<string> {
-  const response = await apiClient.get<{ content: string }>(`/wordlists/${id}/content/`)
-  return response.data.content
+  const response = await apiClient.get<string>(`/wordlists/${id}/content/`, {
+    params: { raw: 1 },
+    responseType: "text",
+    // 原样返回文本，避免 axios 尝试按 JSON 解析纯数字等内容
+    transformResponse: (data) => data,
+  })
+  return response.data
 }
 
-// 更新字典内容
+// 更新字典内容（后端对超过 5MB 的内容返回 413）
 export async function updateWordlistContent(id: number, content: string): Promise<Wordlist> {
-  const response = await apiClient.put<Wordlist>(`/wordlists/${id}/content/`, { content })
-  return response.data
+  try {
+    const response = await apiClient.put<Wordlist>(`/wordlists/${id}/content/`, { content })
+    return response.data
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response?.status === 413) {
+      throw new Error("字典内容超过 5MB，无法在线编辑保存，请重新上传字典文件")
+    }
+    throw error
+  }
 }